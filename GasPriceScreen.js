@@ -55,6 +55,10 @@ const GasPriceScreen = () => {
 
       const response = await fetch(url);
       const data = await response.json();
+      if (__DEV__) {
+        // Per-phase server latency (geocode, csrf, graphql, parse, serialize, total)
+        console.log('Server-Timing:', response.headers.get('server-timing'));
+      }
 
       if (data.success) {
         setGasPrices(data);
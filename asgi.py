@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+ASGI Entry Point for the Gas Price API
+======================================
+
+Serves the same routes as gas_price_api.py on one long-lived event loop per
+worker, so the GasBuddy client (connection pool, CSRF token, in-flight
+requests) and the caches are shared by every request the worker handles.
+
+    gunicorn -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:$PORT asgi:app
+    uvicorn asgi:app --port 8000
+"""
+
+import asyncio
+import functools
+import os
+import time
+from urllib.parse import parse_qsl
+
+from gasbuddy_local import gasbuddy
+from gasbuddy_local.gasbuddy import codec
+from gasbuddy_local.gasbuddy.metrics import REGISTRY
+import gas_price_api
+from timing import CLIENT_HOOKS, RequestTimings
+
+READ_METHODS = ("GET", "HEAD")
+# Largest request body accepted (batch requests)
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class GasPriceApp:
+    """Minimal ASGI application exposing the Flask app's routes."""
+
+    def __init__(self):
+        self.client = None
+        # path -> (allowed methods, handler)
+        self.routes = {
+            "/api/gas-prices": (READ_METHODS, self.gas_prices),
+            "/api/gas-prices/batch": (("POST",), self.gas_prices_batch),
+            "/api/gas-prices/corridor": (("POST",), self.gas_prices_corridor),
+            "/api/health": (READ_METHODS, self.health),
+            "/api/metrics": (READ_METHODS, self.metrics),
+            "/": (READ_METHODS, self.home),
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.dispatch(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        """Open the shared client on startup and close it on shutdown."""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.open_client()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                gas_price_api.hot_tiles.stop()
+                if self.client is not None:
+                    await self.client.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def open_client(self):
+        """Create the shared client and start keeping hot tiles warm with it."""
+        self.client = gasbuddy.GasBuddy(**CLIENT_HOOKS)
+        if gas_price_api.config.HOT_TILES_TOP_N:
+            gas_price_api.hot_tiles.start(self.client)
+
+    async def dispatch(self, scope, receive, send):
+        """Route one HTTP request."""
+        route = self.routes.get(scope["path"])
+        if route is None:
+            await self.respond(send, {"success": False, "error": "Not found"}, 404)
+            return
+        methods, handler = route
+        if scope["method"] not in methods:
+            await self.respond(send, {"success": False, "error": "Method not allowed"}, 405,
+                               [(b"allow", ", ".join(methods).encode())])
+            return
+        if self.client is None:
+            # Server without lifespan support
+            self.open_client()
+
+        if scope["method"] in READ_METHODS:
+            request = {}
+            for key, value in parse_qsl(scope["query_string"].decode("latin-1")):
+                request.setdefault(key, value)  # first value wins, like request.args.get
+        else:
+            raw = await self.read_body(receive)
+            if raw is None:
+                await self.respond(send, {"success": False, "error": "Request body too large"}, 413)
+                return
+            try:
+                request = codec.loads(raw)
+            except ValueError:
+                request = None  # handlers reject it, like Flask's get_json(silent=True)
+        plan = None
+        if scope["path"] == "/api/gas-prices/corridor":
+            # Planned once: prices the request, then serves it
+            plan = gas_price_api.corridor_plan(request)
+            handler = functools.partial(handler, plan=plan)
+        # Charged after reading the body: batches and corridors cost per lookup.
+        # In a thread, as the shared bucket file may be busy with other workers
+        limited = await asyncio.to_thread(
+            gas_price_api.check_rate_limit, scope["path"], self.client_ip(scope),
+            None if scope["method"] in READ_METHODS else request, plan,
+        )
+        if limited is not None:
+            body, seconds = limited
+            await self.respond(send, body, 429, [(b"retry-after", seconds.encode())])
+            return
+        timings = RequestTimings()
+        try:
+            body, status = await handler(request, timings)
+        except Exception as e:
+            body, status = {
+                "success": False,
+                "error": f"Internal server error: {str(e)}"
+            }, 500
+        await self.respond(send, body, status, timings=timings)
+
+    @staticmethod
+    async def read_body(receive) -> bytes | None:
+        """Read the request body, or return None once it exceeds MAX_BODY_BYTES."""
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return b""
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                return None
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    @staticmethod
+    def client_ip(scope) -> str | None:
+        """Client address, trusting one proxy hop like the Flask app's ProxyFix."""
+        for name, value in scope.get("headers", ()):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[-1].strip()
+        client = scope.get("client")
+        return client[0] if client else None
+
+    async def respond(self, send, body, status, headers=(), timings=None):
+        """Send a JSON response, or a plain text one when ``body`` is a string."""
+        started = time.perf_counter()
+        if isinstance(body, str):
+            payload = body.encode()
+            content_type = gas_price_api.METRICS_CONTENT_TYPE.encode()
+        else:
+            payload = codec.dumps(body, sort_keys=True)
+            content_type = b"application/json"
+        if timings is not None:
+            timings.add("serialize", time.perf_counter() - started)
+            headers = [*headers, (b"server-timing", timings.header().encode())]
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", content_type),
+                (b"content-length", str(len(payload)).encode()),
+                *headers,
+            ],
+        })
+        await send({"type": "http.response.body", "body": payload})
+
+    async def gas_prices(self, args, timings):
+        return await gas_price_api.handle_gas_prices(args, self.client, timings)
+
+    async def gas_prices_batch(self, payload, timings):
+        return await gas_price_api.handle_gas_prices_batch(payload, self.client, timings)
+
+    async def gas_prices_corridor(self, payload, timings, plan=None):
+        return await gas_price_api.handle_corridor(payload, self.client, timings, plan)
+
+    async def health(self, args, timings):
+        return gas_price_api.health_payload(), 200
+
+    async def metrics(self, args, timings):
+        return REGISTRY.render(), 200
+
+    async def home(self, args, timings):
+        return gas_price_api.home_payload(), 200
+
+
+app = GasPriceApp()
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run("asgi:app", host='0.0.0.0', port=int(os.getenv('PORT', 8000)))
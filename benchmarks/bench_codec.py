@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+JSON Codec Benchmark
+====================
+
+Compares the old stdlib path (``response.text()`` + ``json.loads``, Flask's
+default encoder) with ``gasbuddy.codec`` on 10- and 500-station payloads.
+
+    python -m benchmarks.bench_codec [--json results.json]
+"""
+
+import argparse
+import json
+import timeit
+
+from benchmarks.payloads import location_payload
+from gasbuddy_local.gasbuddy import codec
+from gasbuddy_local.gasbuddy.models import parse_station
+
+SIZES = (10, 500)
+
+
+def _best(stmt, number: int, repeat: int = 5) -> float:
+    """Return the best per-call time in microseconds."""
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number * 1e6
+
+
+def run(sizes=SIZES) -> list[dict]:
+    """Time decode and encode for each payload size."""
+    rows = []
+    for size in sizes:
+        payload = location_payload(size)
+        body = json.dumps(payload).encode()
+        api_body = {
+            "success": True,
+            "stations": [parse_station(raw).to_dict()
+                         for raw in payload["data"]["locationBySearchTerm"]["stations"]["results"]],
+        }
+        number = max(10, 20000 // size)
+
+        cases = {
+            "decode": (
+                lambda: json.loads(body.decode()),
+                lambda: codec.loads(body),
+            ),
+            "encode": (
+                lambda: json.dumps(api_body, sort_keys=True, separators=(",", ":")).encode(),
+                lambda: codec.dumps(api_body, sort_keys=True),
+            ),
+        }
+        for name, (baseline, candidate) in cases.items():
+            old = _best(baseline, number)
+            new = _best(candidate, number)
+            rows.append({
+                "case": name,
+                "stations": size,
+                "bytes": len(body),
+                "stdlib_us": round(old, 2),
+                "codec_us": round(new, 2),
+                "speedup": round(old / new, 2),
+            })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = run()
+    print(f"codec backend: {codec.BACKEND}")
+    print(f"{'case':<8}{'stations':>10}{'stdlib us':>12}{'codec us':>12}{'speedup':>10}")
+    for row in results:
+        print(f"{row['case']:<8}{row['stations']:>10}{row['stdlib_us']:>12}"
+              f"{row['codec_us']:>12}{row['speedup']:>9}x")
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump({"backend": codec.BACKEND, "results": results}, handle, indent=2)
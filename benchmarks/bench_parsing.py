@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Parsing Hot-Path Benchmarks
+===========================
+
+Times the GasBuddy response parsing and API shaping steps on synthetic
+payloads from 1 to 10,000 stations and stores the results as JSON, so two
+versions can be compared:
+
+    python -m benchmarks.bench_parsing --output benchmarks/results/before.json
+    python -m benchmarks.bench_parsing --compare benchmarks/results/before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+
+# Importing the app must not create the shared geocode cache, rate limit or station index files
+os.environ.setdefault("GEOCODE_CACHE_PATH", "")
+os.environ.setdefault("RATE_LIMIT_PATH", "")
+os.environ.setdefault("STATION_INDEX_PATH", "")
+
+from benchmarks.payloads import location_payload, station_payload
+from gasbuddy_local import gasbuddy
+from gasbuddy_local.gasbuddy.models import parse_station
+import gas_price_api
+
+SIZES = (1, 10, 100, 1000, 10000)
+
+
+def _complete(coro):
+    """Run a coroutine that never suspends without an event loop."""
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("coroutine suspended")
+
+
+def cases(size: int) -> dict:
+    """Return the benchmark callables for a payload of ``size`` stations."""
+    client = gasbuddy.GasBuddy()
+    response = location_payload(size)
+    details = [station_payload(100000 + i)["data"]["station"] for i in range(size)]
+    parsed = _complete(client._parse_results(response, size))
+
+    return {
+        "parse_results": lambda: _complete(client._parse_results(response, size)),
+        "parse_trends": lambda: _complete(client._parse_trends(response)),
+        "price_lookup_shaping": lambda: [parse_station(raw) for raw in details],
+        "shape_stations": lambda: gas_price_api.shape_stations(parsed),
+        "to_dict": lambda: [station.to_dict() for station in parsed],
+    }
+
+
+def run(sizes=SIZES, budget: float = 0.2) -> list[dict]:
+    """Time every case at every size, spending about ``budget`` seconds per case."""
+    rows = []
+    for size in sizes:
+        for name, func in cases(size).items():
+            timer = timeit.Timer(func)
+            number, _ = timer.autorange()
+            number = max(1, int(number * budget / 0.2))
+            best = min(timer.repeat(repeat=5, number=number)) / number
+            rows.append({
+                "case": name,
+                "stations": size,
+                "us_per_call": round(best * 1e6, 3),
+                "ns_per_station": round(best * 1e9 / size, 1),
+            })
+    return rows
+
+
+def compare(current: list[dict], baseline_path: str, threshold: float) -> bool:
+    """Print the change against a stored run; return True if nothing regressed."""
+    with open(baseline_path) as handle:
+        baseline = {(row["case"], row["stations"]): row for row in json.load(handle)["results"]}
+
+    ok = True
+    print(f"\n{'case':<22}{'stations':>10}{'before us':>14}{'now us':>14}{'change':>10}")
+    for row in current:
+        before = baseline.get((row["case"], row["stations"]))
+        if before is None:
+            continue
+        change = row["us_per_call"] / before["us_per_call"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            ok = False
+        print(f"{row['case']:<22}{row['stations']:>10}{before['us_per_call']:>14}"
+              f"{row['us_per_call']:>14}{change:>+9.1%}{flag}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the parsing and shaping hot path")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                        help="Comma separated station counts")
+    parser.add_argument("--budget", type=float, default=0.2, help="Seconds per timing batch")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Stored results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Slowdown that counts as a regression (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    results = run([int(size) for size in args.sizes.split(",")], args.budget)
+    print(f"{'case':<22}{'stations':>10}{'us/call':>14}{'ns/station':>12}")
+    for row in results:
+        print(f"{row['case']:<22}{row['stations']:>10}{row['us_per_call']:>14}"
+              f"{row['ns_per_station']:>12}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as handle:
+            json.dump({
+                "version": gasbuddy.__version__,
+                "python": platform.python_version(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": results,
+            }, handle, indent=2)
+
+    if args.compare and not compare(results, args.compare, args.threshold):
+        sys.exit(1)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Load Test Harness
+=================
+
+Starts the upstream stand-in and an API server pointed at it, drives
+``/api/gas-prices`` with a fixed concurrency and reports throughput and
+p50/p95/p99 latency, so worker models and caching changes can be compared
+offline.
+
+    python -m benchmarks.loadtest --server asgi --workers 2 --concurrency 64 --requests 2000
+    python -m benchmarks.loadtest --server wsgi --threads 16 --latency-ms 120 --error-rate 0.02
+    python -m benchmarks.loadtest --target http://127.0.0.1:8000   # already running server
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+from benchmarks import standin
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Return the nearest-rank percentile of sorted ``values``."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+def build_queries(count: int, seed: int = 0) -> list[dict]:
+    """Return a mix of coordinate, postal code and city queries."""
+    rng = random.Random(seed)
+    queries = []
+    for index in range(count):
+        kind = index % 3
+        if kind == 0:
+            queries.append({"lat": f"{rng.uniform(42, 45):.5f}", "lon": f"{rng.uniform(-81, -78):.5f}"})
+        elif kind == 1:
+            queries.append({"postal_code": f"{rng.randint(10000, 99999)}"})
+        else:
+            queries.append({"city": f"Town {rng.randint(1, 5000)}", "country": "CA"})
+    return queries
+
+
+async def drive(target: str, queries: list[dict], total: int, concurrency: int,
+                timeout: float) -> dict:
+    """Send ``total`` requests with ``concurrency`` in flight and collect latencies."""
+    latencies = []
+    statuses = {}
+    counter = iter(range(total))
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async with aiohttp.ClientSession(timeout=client_timeout, connector=connector) as session:
+        async def worker():
+            for index in counter:
+                params = queries[index % len(queries)]
+                started = time.perf_counter()
+                try:
+                    async with session.get(f"{target}/api/gas-prices", params=params) as response:
+                        await response.read()
+                        status = str(response.status)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    status = type(e).__name__
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        "statuses": statuses,
+    }
+
+
+async def wait_until_up(url: str, timeout: float = 30) -> None:
+    """Poll ``url`` until it answers."""
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.get(url) as response:
+                    if response.status < 500:
+                        return
+            except aiohttp.ClientError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} did not come up")
+            await asyncio.sleep(0.2)
+
+
+def server_command(args) -> list[str]:
+    """Return the gunicorn command for the chosen worker model."""
+    bind = ["--bind", f"127.0.0.1:{args.port}", "--workers", str(args.workers)]
+    if args.server == "asgi":
+        return [sys.executable, "-m", "gunicorn", *bind, "-k", "uvicorn.workers.UvicornWorker", "asgi:app"]
+    return [sys.executable, "-m", "gunicorn", *bind, "-k", "gthread", "--threads", str(args.threads),
+            "gas_price_api:app"]
+
+
+async def main(args) -> dict:
+    processes = []
+    target = args.target
+    upstream = f"http://127.0.0.1:{args.upstream_port}"
+    try:
+        if not target:
+            processes.append(subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.standin", "--port", str(args.upstream_port),
+                 "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+                 "--error-rate", str(args.error_rate), "--stations", str(args.stations),
+                 "--home-kb", str(args.home_kb), "--pages", str(args.pages)],
+                cwd=ROOT,
+            ))
+            await wait_until_up(f"{upstream}/_stats")
+
+            workdir = tempfile.mkdtemp()
+            env = dict(os.environ)
+            env.update({
+                "GASBUDDY_BASE_URL": f"{upstream}/graphql",
+                "GASBUDDY_HOME_URL": f"{upstream}/home",
+                "NOMINATIM_URL": f"{upstream}/search",
+                "GEOCODE_CACHE_PATH": os.path.join(workdir, "geocode.sqlite3"),
+                "STATION_INDEX_PATH": os.path.join(workdir, "stations.sqlite3"),
+                "RATE_LIMIT": "0",
+            })
+            processes.append(subprocess.Popen(server_command(args), cwd=ROOT, env=env))
+            target = f"http://127.0.0.1:{args.port}"
+            await wait_until_up(f"{target}/api/health")
+
+        queries = build_queries(args.locations, args.seed)
+        if args.warmup:
+            await drive(target, queries, args.warmup, args.concurrency, args.timeout)
+        report = await drive(target, queries, args.requests, args.concurrency, args.timeout)
+        report["server"] = "external" if args.target else args.server
+
+        if not args.target:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"{upstream}/_stats") as response:
+                    report["upstream_calls"] = await response.json()
+        return report
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test /api/gas-prices against a local stand-in")
+    parser.add_argument("--target", help="Drive an already running API instead of starting one")
+    parser.add_argument("--server", choices=("asgi", "wsgi"), default="asgi")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=8, help="Threads per wsgi worker")
+    parser.add_argument("--port", type=int, default=8901, help="Port of the API server")
+    parser.add_argument("--upstream-port", type=int, default=8900, help="Port of the stand-in")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=0, help="Requests sent before measuring")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--locations", type=int, default=200, help="Distinct locations in the mix")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the report to this file")
+    standin.add_arguments(parser)
+    args = parser.parse_args()
+
+    result = asyncio.run(main(args))
+    print(json.dumps(result, indent=2))
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump(result, handle, indent=2)
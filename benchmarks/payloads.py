@@ -0,0 +1,78 @@
+"""
+Synthetic GasBuddy Payloads
+===========================
+
+Deterministic GraphQL responses shaped like the real ``LocationBySearchTerm``
+and ``GetStation`` answers, for benchmarks and the load-test stand-in.
+"""
+
+import random
+
+FUEL_PRODUCTS = ("regular_gas", "midgrade_gas", "premium_gas", "diesel")
+NICKNAMES = ("gasuser123", "buddy456", "premium_user", "diesel_guy", "")
+
+
+def station(index: int, lat: float = 43.65, lon: float = -79.38, rng: random.Random = None,
+            brands: bool = False) -> dict:
+    """Return one raw GraphQL station object near (lat, lon)."""
+    rng = rng or random.Random(index)
+    prices = []
+    for product in FUEL_PRODUCTS:
+        if rng.random() < 0.2:
+            continue
+        credit = round(rng.uniform(120, 220), 1)
+        cash = round(credit - rng.uniform(0, 10), 1) if rng.random() < 0.3 else None
+        posted = f"2025-08-27T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00.000Z"
+        prices.append({
+            "cash": {"nickname": rng.choice(NICKNAMES), "postedTime": posted, "price": cash}
+            if cash else None,
+            "credit": {"nickname": rng.choice(NICKNAMES), "postedTime": posted, "price": credit},
+            "fuelProduct": product,
+            "longName": product.replace("_", " ").title(),
+        })
+    raw = {
+        "address": {"line1": f"{100 + index} Main Street"},
+        "id": str(100000 + index),
+        "name": f"Station {index}",
+        "prices": prices,
+        "priceUnit": "dollars_per_liter",
+        "currency": "CAD",
+        "latitude": round(lat + rng.uniform(-0.05, 0.05), 6),
+        "longitude": round(lon + rng.uniform(-0.05, 0.05), 6),
+    }
+    if brands:
+        raw["brands"] = [{"imageUrl": f"https://images.example/brand/{index % 40}.png"}]
+    return raw
+
+
+def location_payload(count: int, lat: float = 43.65, lon: float = -79.38, seed: int = 0,
+                     next_cursor: str = None) -> dict:
+    """Return a ``LocationBySearchTerm`` response with ``count`` stations."""
+    rng = random.Random(seed)
+    return {
+        "data": {
+            "locationBySearchTerm": {
+                "stations": {
+                    "count": count,
+                    "cursor": {"next": next_cursor},
+                    "results": [station(i, lat, lon, rng) for i in range(count)],
+                },
+                "trends": [{
+                    "areaName": "Ontario",
+                    "country": "CA",
+                    "today": 165.3,
+                    "todayLow": 149.9,
+                    "trend": 0,
+                }],
+            }
+        }
+    }
+
+
+def station_payload(station_id: int | str) -> dict:
+    """Return a ``GetStation`` response."""
+    index = int(station_id) % 100000
+    raw = station(index, brands=True)
+    raw["id"] = str(station_id)
+    del raw["name"], raw["address"]
+    return {"data": {"station": raw}}
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Upstream Stand-in Server
+========================
+
+Local replacement for the GasBuddy GraphQL endpoint, the GasBuddy home page
+(CSRF token) and Nominatim search, with configurable latency, error rate and
+payload size. Point the API at it with:
+
+    GASBUDDY_BASE_URL=http://127.0.0.1:8900/graphql
+    GASBUDDY_HOME_URL=http://127.0.0.1:8900/home
+    NOMINATIM_URL=http://127.0.0.1:8900/search
+
+    python -m benchmarks.standin --port 8900 --latency-ms 80 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import random
+import zlib
+
+from aiohttp import web
+
+from benchmarks.payloads import location_payload, station_payload
+
+TOKEN = "1.standin-token"
+
+
+class StandIn:
+    """Request handlers and their knobs."""
+
+    def __init__(self, latency_ms=50.0, jitter_ms=10.0, error_rate=0.0, stations=20,
+                 home_kb=200, pages=1, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.stations = stations
+        self.home_kb = home_kb
+        self.pages = pages
+        self.rng = random.Random(seed)
+        self.counts = {"home": 0, "graphql": 0, "search": 0, "errors": 0}
+
+    async def delay(self):
+        seconds = max(0.0, self.rng.gauss(self.latency_ms, self.jitter_ms)) / 1000
+        await asyncio.sleep(seconds)
+
+    def fail(self):
+        """Return an error response for a configurable share of requests."""
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.counts["errors"] += 1
+            return web.Response(status=self.rng.choice((429, 500, 503)), text="upstream error")
+        return None
+
+    async def home(self, request):
+        self.counts["home"] += 1
+        await self.delay()
+        padding = "<!-- padding -->" * (self.home_kb * 1024 // 32)
+        html = f"<html><head>{padding}<script>window.gbcsrf = \"{TOKEN}\";</script></head>{padding}</html>"
+        return web.Response(text=html, content_type="text/html")
+
+    async def graphql(self, request):
+        self.counts["graphql"] += 1
+        await self.delay()
+        error = self.fail()
+        if error is not None:
+            return error
+        if request.headers.get("gbcsrf") != TOKEN:
+            return web.json_response({"errors": [{"message": "bad csrf"}]}, status=403)
+
+        body = await request.json()
+        variables = body.get("variables") or {}
+        operation = body.get("operationName")
+        if operation == "LocationBySearchTerm":
+            lat = float(variables.get("lat") or 43.65)
+            lon = float(variables.get("lng") or -79.38)
+            page = int(variables.get("cursor") or 0)
+            next_cursor = str(page + 1) if page + 1 < self.pages else None
+            seed = hash((round(lat, 3), round(lon, 3), page))
+            return web.json_response(location_payload(self.stations, lat, lon, seed, next_cursor))
+        if operation == "GetStation":
+            return web.json_response(station_payload(variables["id"]))
+        if operation == "GetStations":
+            data = {f"s{key[2:]}": station_payload(value)["data"]["station"]
+                    for key, value in variables.items()}
+            return web.json_response({"data": data})
+        return web.json_response({"errors": [{"message": f"unknown operation {operation}"}]})
+
+    async def search(self, request):
+        self.counts["search"] += 1
+        await self.delay()
+        error = self.fail()
+        if error is not None:
+            return error
+        query = request.query.get("q", "")
+        digest = zlib.crc32(query.lower().encode())
+        lat = 25 + (digest % 2500) / 100
+        lon = -125 + (digest // 2500 % 6000) / 100
+        return web.json_response([{"lat": str(lat), "lon": str(lon)}])
+
+    async def stats(self, request):
+        return web.json_response(self.counts)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/home", self.home)
+        app.router.add_post("/graphql", self.graphql)
+        app.router.add_get("/search", self.search)
+        app.router.add_get("/_stats", self.stats)
+        return app
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the stand-in knobs on ``parser``."""
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Mean upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Latency standard deviation")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of 429/5xx answers")
+    parser.add_argument("--stations", type=int, default=20, help="Stations per result page")
+    parser.add_argument("--home-kb", type=int, default=200, help="Size of the CSRF home page")
+    parser.add_argument("--pages", type=int, default=1, help="Result pages behind the cursor")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GasBuddy/Nominatim stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    standin = StandIn(args.latency_ms, args.jitter_ms, args.error_rate, args.stations,
+                      args.home_kb, args.pages)
+    web.run_app(standin.app(), host=args.host, port=args.port, print=None)
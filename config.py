@@ -2,18 +2,82 @@
 Configuration settings for GasBuddy API
 """
 import os
+import tempfile
 
 class Config:
     """Base configuration."""
     FLASK_ENV = os.getenv('FLASK_ENV', 'production')
     DEBUG = os.getenv('FLASK_DEBUG', 'false').lower() == 'true'
 
-    # Rate limiting (requests per minute per IP)
+    # Rate limiting (requests per minute per IP; 0 disables). Buckets live in a
+    # SQLite file shared by all workers on the node (empty path = per process)
     RATE_LIMIT = int(os.getenv('RATE_LIMIT', '10'))
+    RATE_LIMIT_BURST = int(os.getenv('RATE_LIMIT_BURST', '0')) or RATE_LIMIT
+    RATE_LIMIT_PATH = os.getenv(
+        'RATE_LIMIT_PATH', os.path.join(tempfile.gettempdir(), 'gasbuddy_ratelimit.sqlite3'))
 
     # CORS settings
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*')
 
+    # Geocode cache (SQLite file shared by all workers; empty path = memory only)
+    GEOCODE_CACHE_PATH = os.getenv(
+        'GEOCODE_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'gasbuddy_geocode.sqlite3'))
+    GEOCODE_CACHE_TTL = int(os.getenv('GEOCODE_CACHE_TTL', str(30 * 24 * 3600)))
+    GEOCODE_NEGATIVE_TTL = int(os.getenv('GEOCODE_NEGATIVE_TTL', '3600'))
+    GEOCODE_CACHE_SIZE = int(os.getenv('GEOCODE_CACHE_SIZE', '10000'))
+
+    # Station prices cached per geohash tile (precision 6 is about 1.2 km x 0.6 km)
+    PRICE_TILE_PRECISION = int(os.getenv('PRICE_TILE_PRECISION', '6'))
+    PRICE_CACHE_TTL = int(os.getenv('PRICE_CACHE_TTL', '300'))
+    PRICE_CACHE_TILES = int(os.getenv('PRICE_CACHE_TILES', '5000'))
+    PRICE_TILE_FETCH_LIMIT = int(os.getenv('PRICE_TILE_FETCH_LIMIT', '50'))
+    # Expired tiles kept this long to answer while GasBuddy is failing
+    PRICE_CACHE_STALE_TTL = int(os.getenv('PRICE_CACHE_STALE_TTL', '3600'))
+    # Tiles expired less than this long ago are served while refreshed behind the request
+    PRICE_CACHE_REVALIDATE_TTL = int(os.getenv('PRICE_CACHE_REVALIDATE_TTL', '120'))
+    # Every HOT_TILES_INTERVAL seconds, re-fetch the HOT_TILES_TOP_N most requested
+    # tiles (at least HOT_TILES_MIN_REQUESTS recent requests) expiring within
+    # HOT_TILES_LEAD seconds; 0 top tiles disables it
+    HOT_TILES_TOP_N = int(os.getenv('HOT_TILES_TOP_N', '50'))
+    HOT_TILES_INTERVAL = float(os.getenv('HOT_TILES_INTERVAL', '30'))
+    HOT_TILES_LEAD = float(os.getenv('HOT_TILES_LEAD', '60'))
+    HOT_TILES_MIN_REQUESTS = float(os.getenv('HOT_TILES_MIN_REQUESTS', '2'))
+
+    # Local index of every station seen (SQLite file shared by all workers;
+    # empty path = memory only). A lookup in an uncached tile is answered from
+    # it when it knows enough stations within STATION_INDEX_RADIUS_KM seen in
+    # the last STATION_INDEX_MAX_AGE seconds, while the tile is fetched behind it
+    STATION_INDEX_PATH = os.getenv(
+        'STATION_INDEX_PATH', os.path.join(tempfile.gettempdir(), 'gasbuddy_stations.sqlite3'))
+    STATION_INDEX_RADIUS_KM = float(os.getenv('STATION_INDEX_RADIUS_KM', '3'))
+    STATION_INDEX_MIN_STATIONS = int(os.getenv('STATION_INDEX_MIN_STATIONS', '5'))
+    STATION_INDEX_MAX_AGE = int(os.getenv('STATION_INDEX_MAX_AGE', '3600'))
+
+    # Countries advertised by the API and compiled into the offline gazetteer
+    SUPPORTED_COUNTRIES = ["US", "CA", "GB", "AU", "DE", "FR", "IT", "ES", "NL", "BE", "AT", "CH"]
+
+    # Ranking of nearby stations: most stations one request may return, and the
+    # share of the fuel price one km of distance adds to a station's value score
+    # (a round trip at ~8 L/100 km spread over a 40 L fill is about 0.4%/km)
+    MAX_RESULTS = int(os.getenv('MAX_RESULTS', '50'))
+    VALUE_DISTANCE_WEIGHT = float(os.getenv('VALUE_DISTANCE_WEIGHT', '0.004'))
+
+    # POST /api/gas-prices/batch: locations per request and lookups run at once
+    BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '100'))
+    BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '8'))
+
+    # Route corridor search: coarser tiles (precision 5 is about 4.9 km x 4.9 km),
+    # queried just often enough along the route for answers reaching
+    # CORRIDOR_TILE_REACH_KM from each tile's centre to cover the corridor
+    CORRIDOR_TILE_PRECISION = int(os.getenv('CORRIDOR_TILE_PRECISION', '5'))
+    CORRIDOR_TILE_REACH_KM = float(os.getenv('CORRIDOR_TILE_REACH_KM', '15'))
+    CORRIDOR_MAX_WIDTH_KM = float(os.getenv('CORRIDOR_MAX_WIDTH_KM', '25'))
+    CORRIDOR_MAX_TILES = int(os.getenv('CORRIDOR_MAX_TILES', '150'))
+    CORRIDOR_CONCURRENCY = int(os.getenv('CORRIDOR_CONCURRENCY', '8'))
+
+    # Offline gazetteer index (built with gazetteer.py); skipped when missing
+    GAZETTEER_PATH = os.getenv('GAZETTEER_PATH', 'gazetteer.idx')
+
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
@@ -0,0 +1,328 @@
+"""
+Route Corridor Search
+=====================
+
+Finds stations within a given distance of a route. One upstream answer
+covers about ``reach_km`` around its tile's centre, so tiles are picked along
+the route (in parallel lanes for a wide corridor) just far enough apart for
+their answers to cover the whole corridor. Each is fetched once (through a
+TilePriceCache, concurrently), and the stations they return are de-duplicated
+by ``station_id`` and kept when they lie inside the corridor.
+"""
+
+import asyncio
+import math
+
+import aiohttp
+
+from geo import EARTH_RADIUS_KM, geohash_cell_size, geohash_center, geohash_encode, haversine_km
+from gasbuddy_local import gasbuddy
+from gasbuddy_local.gasbuddy.exceptions import GasBuddyError
+from price_cache import TilePriceCache
+
+# Longest segment kept after densifying; keeps the flat-earth projection exact enough
+MAX_SEGMENT_KM = 2.0
+# Grid cell (degrees) used to find the route segments near a station
+CELL_DEGREES = 0.1
+# Step between the route points whose surroundings decide which tiles to fetch
+TILE_STEP_KM = 0.5
+# Most parallel lanes of tiles a wide corridor is split into
+MAX_LANES = 8
+
+_KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> list[tuple[float, float]]:
+    """Decode a Google encoded polyline into (lat, lon) points."""
+    points = []
+    index = lat = lon = 0
+    factor = 10 ** precision
+    while index < len(encoded):
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1F) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        points.append((lat / factor, lon / factor))
+    return points
+
+
+def parse_route(route) -> list[tuple[float, float]]:
+    """
+    Read a route given as an encoded polyline, [[lat, lon], ...] or [{"lat", "lon"}, ...].
+
+    Raises:
+        ValueError: If the route is malformed or has fewer than two points
+    """
+    if isinstance(route, str):
+        try:
+            points = decode_polyline(route)
+        except IndexError:
+            raise ValueError("Malformed encoded polyline") from None
+    elif isinstance(route, list):
+        points = []
+        for point in route:
+            if isinstance(point, dict):
+                point = (point.get("lat"), point.get("lon"))
+            try:
+                lat, lon = float(point[0]), float(point[1])
+            except (TypeError, IndexError, ValueError):
+                raise ValueError(f"Invalid route point: {point!r}") from None
+            points.append((lat, lon))
+    else:
+        raise ValueError("Route must be an encoded polyline or a list of points")
+
+    if len(points) < 2:
+        raise ValueError("Route needs at least two points")
+    if any(not (-90 <= lat <= 90 and -180 <= lon <= 180) for lat, lon in points):
+        raise ValueError("Route point out of range")
+    return points
+
+
+def densify(points: list[tuple[float, float]], max_step_km: float = MAX_SEGMENT_KM):
+    """Insert points so no segment is longer than ``max_step_km``."""
+    dense = [points[0]]
+    for (lat1, lon1), (lat2, lon2) in zip(points, points[1:]):
+        steps = max(1, math.ceil(haversine_km(lat1, lon1, lat2, lon2) / max_step_km))
+        for step in range(1, steps + 1):
+            fraction = step / steps
+            dense.append((lat1 + (lat2 - lat1) * fraction, lon1 + (lon2 - lon1) * fraction))
+    return dense
+
+
+class RouteIndex:
+    """Distance from points to a densified route, with segments bucketed on a grid."""
+
+    def __init__(self, points: list[tuple[float, float]], width_km: float):
+        """
+        Index ``points`` for queries up to ``width_km`` away from the route.
+
+        Args:
+            points: Densified route (segments no longer than MAX_SEGMENT_KM)
+            width_km: Corridor half-width
+        """
+        self.points = points
+        self.width_km = width_km
+        self.along = [0.0]
+        for (lat1, lon1), (lat2, lon2) in zip(points, points[1:]):
+            self.along.append(self.along[-1] + haversine_km(lat1, lon1, lat2, lon2))
+        self.length_km = self.along[-1]
+
+        self._cells = {}
+        pad_lat = width_km / _KM_PER_DEGREE
+        for segment, ((lat1, lon1), (lat2, lon2)) in enumerate(zip(points, points[1:])):
+            pad_lon = pad_lat / max(0.01, math.cos(math.radians(max(abs(lat1), abs(lat2)))))
+            for row in range(self._cell(min(lat1, lat2) - pad_lat),
+                             self._cell(max(lat1, lat2) + pad_lat) + 1):
+                for col in range(self._cell(min(lon1, lon2) - pad_lon),
+                                 self._cell(max(lon1, lon2) + pad_lon) + 1):
+                    self._cells.setdefault((row, col), []).append(segment)
+
+    @staticmethod
+    def _cell(degrees: float) -> int:
+        return math.floor(degrees / CELL_DEGREES)
+
+    def locate(self, lat: float, lon: float) -> tuple[float, float] | None:
+        """
+        Return (km off the route, km along the route) for a point inside the corridor.
+
+        Returns:
+            None when the point is further than ``width_km`` from the route
+        """
+        best = None
+        for segment in self._cells.get((self._cell(lat), self._cell(lon)), ()):
+            (lat1, lon1), (lat2, lon2) = self.points[segment], self.points[segment + 1]
+            # Flat-earth projection around the segment start (segments are short)
+            scale = math.cos(math.radians(lat1)) * _KM_PER_DEGREE
+            dx, dy = (lon2 - lon1) * scale, (lat2 - lat1) * _KM_PER_DEGREE
+            px, py = (lon - lon1) * scale, (lat - lat1) * _KM_PER_DEGREE
+            length_sq = dx * dx + dy * dy
+            t = 0.0 if not length_sq else min(1.0, max(0.0, (px * dx + py * dy) / length_sq))
+            offset = math.hypot(px - t * dx, py - t * dy)
+            if best is None or offset < best[0]:
+                best = (offset, self.along[segment] + t * math.sqrt(length_sq))
+        if best is None or best[0] > self.width_km:
+            return None
+        return best
+
+
+def extend(points: list[tuple[float, float]], km: float) -> list[tuple[float, float]]:
+    """Return ``points`` with both ends carried ``km`` further in their direction."""
+    ends = []
+    for (lat1, lon1), (lat2, lon2) in ((points[1], points[0]), (points[-2], points[-1])):
+        scale = max(0.01, math.cos(math.radians(lat2))) * _KM_PER_DEGREE
+        dx, dy = (lon2 - lon1) * scale, (lat2 - lat1) * _KM_PER_DEGREE
+        length = math.hypot(dx, dy)
+        ends.append((min(90.0, max(-90.0, lat2 + km * dy / length / _KM_PER_DEGREE)),
+                     (lon2 + km * dx / length / scale + 180) % 360 - 180)
+                    if length else (lat2, lon2))
+    return [ends[0], *points, ends[1]]
+
+
+def offset_lane(points: list[tuple[float, float]], offset_km: float) -> list[tuple[float, float]]:
+    """Return ``points`` shifted ``offset_km`` to the left of the route (right when negative)."""
+    if not offset_km:
+        return points
+    lane = []
+    for index, (lat, lon) in enumerate(points):
+        scale = max(0.01, math.cos(math.radians(lat))) * _KM_PER_DEGREE
+        normals = []
+        for segment in (index - 1, index):
+            if not 0 <= segment < len(points) - 1:
+                continue
+            (lat1, lon1), (lat2, lon2) = points[segment], points[segment + 1]
+            dx, dy = (lon2 - lon1) * scale, (lat2 - lat1) * _KM_PER_DEGREE
+            length = math.hypot(dx, dy)
+            if length:
+                normals.append((-dy / length, dx / length))
+        if not normals:
+            lane.append((lat, lon))
+            continue
+        nx, ny = sum(n[0] for n in normals), sum(n[1] for n in normals)
+        length = math.hypot(nx, ny)
+        nx, ny = (nx / length, ny / length) if length > 1e-9 else normals[0]
+        # Mitre the bends, so the lane stays offset_km from the segments on both sides
+        stretch = offset_km / max(0.5, nx * normals[0][0] + ny * normals[0][1])
+        lane.append((min(90.0, max(-90.0, lat + stretch * ny / _KM_PER_DEGREE)),
+                     (lon + stretch * nx / scale + 180) % 360 - 180))
+    return lane
+
+
+def corridor_tiles(points: list[tuple[float, float]], width_km: float, precision: int,
+                   reach_km: float, max_tiles: int) -> list[str]:
+    """
+    Return tiles whose answers together cover the corridor, in route order.
+
+    Args:
+        points: Route points
+        width_km: Corridor half-width
+        precision: Geohash length of a tile
+        reach_km: Distance from a tile's centre its upstream answer is trusted to cover
+        max_tiles: Stop once more tiles than this are found
+
+    Returns:
+        The tiles, or the first ``max_tiles + 1`` of them when there are more
+
+    Raises:
+        ValueError: If tiles of ``precision`` cannot cover the corridor within ``reach_km``
+    """
+    lat_size, lon_size = geohash_cell_size(precision)
+    # Furthest a tile's centre can be from a point inside it
+    snap_km = math.hypot(lat_size, lon_size) * _KM_PER_DEGREE / 2
+    # Each lane covers a band of width_km / lanes either side of it: pick the
+    # lane count needing the fewest tiles on a straight route
+    best = None
+    for lanes in range(1, MAX_LANES + 1):
+        band = width_km / lanes
+        # Distance from a lane point to a tile centre that still covers its band
+        cover = reach_km - band - TILE_STEP_KM / 2
+        if cover >= snap_km and (best is None or lanes / (2 * cover - snap_km) < best[0]):
+            best = (lanes / (2 * cover - snap_km), lanes, band, cover)
+    if best is None:
+        raise ValueError(f"width_km={width_km:g} is too wide for tiles reaching {reach_km:g} km")
+    _, lanes, band, cover = best
+
+    # The corridor has round ends: carry the lanes width_km past both ends of the route
+    dense = densify(extend(points, width_km), TILE_STEP_KM)
+    tiles = {}
+    for lane_number in range(lanes):
+        # Densified again: at bends the offset points spread apart
+        lane = densify(offset_lane(dense, (2 * lane_number + 1 - lanes) * band), TILE_STEP_KM)
+        center = None
+        for index, (lat, lon) in enumerate(lane):
+            if center is not None and haversine_km(lat, lon, *center) <= cover:
+                continue
+            # Query as far ahead as still covers this point, from wherever the tile's centre falls
+            ahead = index
+            while (ahead + 1 < len(lane)
+                   and haversine_km(lat, lon, *lane[ahead + 1]) <= cover - snap_km):
+                ahead += 1
+            tile = geohash_encode(*lane[ahead], precision)
+            center = geohash_center(tile)
+            tiles.setdefault(tile, index)
+            if len(tiles) > max_tiles:
+                return list(tiles)
+    return sorted(tiles, key=tiles.get)
+
+
+def plan_corridor(route, width_km: float, precision: int, reach_km: float,
+                  max_tiles: int) -> tuple[list[tuple[float, float]], list[str]]:
+    """
+    Return the densified route and the tiles a corridor search over it queries.
+
+    Raises:
+        ValueError: If the route is malformed or needs more than ``max_tiles`` tiles
+    """
+    points = densify(parse_route(route))
+    tiles = corridor_tiles(points, width_km, precision, reach_km, max_tiles)
+    if len(tiles) > max_tiles:
+        raise ValueError(f"Route too long: needs more than {max_tiles} tiles "
+                         f"at width_km={width_km:g}; use a shorter route or narrower corridor")
+    return points, tiles
+
+
+async def corridor_search(client: gasbuddy.GasBuddy, cache: TilePriceCache, route,
+                          width_km: float, reach_km: float, concurrency: int,
+                          max_tiles: int, plan: tuple = None) -> dict:
+    """
+    Find the stations within ``width_km`` of ``route``.
+
+    Args:
+        client: GasBuddy client to query with
+        cache: Tile cache the route's tiles are fetched through
+        route: Encoded polyline or list of points (see parse_route)
+        width_km: Corridor half-width
+        reach_km: Distance from a tile's centre its upstream answer covers
+        concurrency: Tiles fetched at once
+        max_tiles: Largest number of tiles one route may query
+        plan: plan_corridor's answer for these arguments, when already computed
+
+    Returns:
+        {"stations": [(station, km off route, km along route), ...] in route
+        order, "tiles": queried, "failed_tiles": tiles without an answer,
+        "length_km": route length, "stale": whether any tile was stale}
+
+    Raises:
+        ValueError: If the route is malformed or needs more than ``max_tiles`` tiles
+    """
+    points, tiles = plan or plan_corridor(route, width_km, cache.precision, reach_km, max_tiles)
+    index = RouteIndex(points, width_km)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def load(tile):
+        async with semaphore:
+            try:
+                return await cache.load(client, tile)
+            except (GasBuddyError, aiohttp.ClientError, asyncio.TimeoutError):
+                return None
+
+    answers = await asyncio.gather(*(load(tile) for tile in tiles))
+
+    found = {}
+    seen = set()
+    for answer in answers:
+        for station in (answer or {}).get("results", []):
+            station_id = station.get("station_id")
+            if station_id in seen:
+                continue
+            seen.add(station_id)
+            position = index.locate(station["latitude"], station["longitude"])
+            if position is not None:
+                found[station_id] = (station, *position)
+
+    return {
+        "stations": sorted(found.values(), key=lambda entry: entry[2]),
+        "tiles": len(tiles),
+        "failed_tiles": sum(answer is None for answer in answers),
+        "length_km": index.length_km,
+        "stale": any(answer and answer.get("stale") for answer in answers),
+    }
@@ -7,118 +7,363 @@ This Flask server provides a REST API that your React Native app can call
 to get gas prices by postal code using the py-gasbuddy package.
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 import asyncio
 from gasbuddy_local import gasbuddy
-import requests
+from gasbuddy_local.gasbuddy import codec
+from gasbuddy_local.gasbuddy.exceptions import CircuitOpenError, OverloadedError
+from gasbuddy_local.gasbuddy.metrics import REGISTRY
+from gasbuddy_local.gasbuddy.sync import SyncGasBuddy
+from config import get_config
+from corridor import corridor_search, plan_corridor
+from gazetteer import load_gazetteer
+from geocache import GeocodeCache, normalize_location
+from geocoding import Geocoder
+from price_cache import HotTileRefresher, TilePriceCache
+from rate_limit import RateLimiter, retry_after
+from station_index import StationIndex
+from timing import CLIENT_HOOKS, RequestTimings, activate
 import json
 import os
+import time
 from werkzeug.middleware.proxy_fix import ProxyFix
 
+
+class CodecJSONProvider(DefaultJSONProvider):
+    """Serialize responses with the gasbuddy codec (orjson when installed)."""
+
+    def dumps(self, obj, **kwargs):
+        return codec.dumps(obj, sort_keys=self.sort_keys).decode()
+
+    def loads(self, s, **kwargs):
+        return codec.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(codec.dumps(obj, sort_keys=self.sort_keys),
+                                        mimetype=self.mimetype)
+
+
 app = Flask(__name__)
+app.json = CodecJSONProvider(app)
 
 # Enable proxy fix for hosting services that use reverse proxies
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
 
+config = get_config()
+
+# Shared by every request in this worker (and, on disk, by every worker)
+geocode_cache = GeocodeCache(
+    path=config.GEOCODE_CACHE_PATH,
+    ttl=config.GEOCODE_CACHE_TTL,
+    negative_ttl=config.GEOCODE_NEGATIVE_TTL,
+    max_entries=config.GEOCODE_CACHE_SIZE,
+)
+
+# Offline postal code / city index, if one has been built for this deployment
+gazetteer = load_gazetteer(config.GAZETTEER_PATH)
+
+# Every station seen upstream, shared by the workers on this node
+station_index = StationIndex(config.STATION_INDEX_PATH)
+
+# Nearby-station answers shared by all requests landing in the same tile
+price_cache = TilePriceCache(
+    precision=config.PRICE_TILE_PRECISION,
+    ttl=config.PRICE_CACHE_TTL,
+    max_tiles=config.PRICE_CACHE_TILES,
+    fetch_limit=config.PRICE_TILE_FETCH_LIMIT,
+    stale_ttl=config.PRICE_CACHE_STALE_TTL,
+    revalidate_ttl=config.PRICE_CACHE_REVALIDATE_TTL,
+    index=station_index,
+    index_radius_km=config.STATION_INDEX_RADIUS_KM,
+    index_min_stations=config.STATION_INDEX_MIN_STATIONS,
+    index_max_age=config.STATION_INDEX_MAX_AGE,
+)
+
+# Coarser tiles for route corridor searches
+corridor_cache = TilePriceCache(
+    precision=config.CORRIDOR_TILE_PRECISION,
+    ttl=config.PRICE_CACHE_TTL,
+    max_tiles=config.PRICE_CACHE_TILES,
+    fetch_limit=config.PRICE_TILE_FETCH_LIMIT,
+    stale_ttl=config.PRICE_CACHE_STALE_TTL,
+    revalidate_ttl=config.PRICE_CACHE_REVALIDATE_TTL,
+    index=station_index,
+)
+
+# Keeps the busiest nearby tiles warm; started on the event loop that serves requests
+hot_tiles = HotTileRefresher(
+    price_cache,
+    top_n=config.HOT_TILES_TOP_N,
+    interval=config.HOT_TILES_INTERVAL,
+    lead=config.HOT_TILES_LEAD,
+    min_score=config.HOT_TILES_MIN_REQUESTS,
+)
+
+# Token buckets per client IP, shared by the workers on this node
+rate_limiter = RateLimiter(config.RATE_LIMIT, config.RATE_LIMIT_BURST, config.RATE_LIMIT_PATH)
+RATE_LIMITED_PATHS = {'/api/gas-prices', '/api/gas-prices/batch', '/api/gas-prices/corridor'}
+
+# One background event loop per worker runs every upstream call made by the
+# Flask views, so threads share its client, connection pool and CSRF token
+background = SyncGasBuddy(**CLIENT_HOOKS)
+
+
+def start_hot_tiles() -> None:
+    """Start the hot-tile refresher on the background loop (again after a fork)."""
+    if config.HOT_TILES_TOP_N and not hot_tiles.running(background.loop):
+        background.loop.call_soon_threadsafe(hot_tiles.start, background.client)
+
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def cache_metrics():
+    """Expose the cache hit/miss counters through the metrics registry."""
+    geocode = geocode_cache.stats()
+    yield ("geocode_cache_lookups_total", "counter", "Geocode cache lookups by result.", [
+        ({"result": "memory_hit"}, geocode["memory_hits"]),
+        ({"result": "disk_hit"}, geocode["disk_hits"]),
+        ({"result": "miss"}, geocode["misses"]),
+    ])
+    yield ("geocode_cache_entries", "gauge", "Geocode entries held in memory.",
+           [({}, geocode["memory_entries"])])
+
+    if gazetteer is not None:
+        offline = gazetteer.stats()
+        yield ("gazetteer_lookups_total", "counter", "Offline gazetteer lookups by result.", [
+            ({"result": "hit"}, offline["hits"]),
+            ({"result": "miss"}, offline["misses"]),
+        ])
+
+    tile_caches = {"nearby": price_cache.stats(), "corridor": corridor_cache.stats()}
+    yield ("price_cache_lookups_total", "counter", "Price tile cache lookups by result.", [
+        ({"cache": name, "result": result}, prices[key])
+        for name, prices in tile_caches.items()
+        for result, key in (("hit", "hits"), ("miss", "misses"), ("stale", "stale_hits"),
+                            ("index", "index_hits"), ("revalidate", "revalidations"))
+    ])
+    yield ("price_cache_tiles", "gauge", "Price tiles held in memory.", [
+        ({"cache": name}, prices["tiles"]) for name, prices in tile_caches.items()
+    ])
+    yield ("price_cache_hot_refreshes_total", "counter",
+           "Background refreshes of hot tiles before they expired.",
+           [({"cache": "nearby"}, hot_tiles.stats()["refreshed"])])
+    yield ("station_index_stations", "gauge", "Stations held in the local station index.",
+           [({}, station_index.stats()["stations"])])
+
+
+REGISTRY.register_collector(cache_metrics)
+
+
+def rate_limit_metrics():
+    """Expose the rate limiter counters through the metrics registry."""
+    limits = rate_limiter.stats()
+    yield ("rate_limit_requests_total", "counter", "Rate limited requests by result.", [
+        ({"result": "allowed"}, limits["allowed"]),
+        ({"result": "limited"}, limits["limited"]),
+    ])
+
+
+REGISTRY.register_collector(rate_limit_metrics)
+
+
+def corridor_plan(payload):
+    """
+    Plan a corridor request's tiles once, to price it and then to serve it.
 
-def geocode_location(location: str, country_code: str = None) -> tuple[float, float] | None:
+    Returns:
+        plan_corridor's (points, tiles), or None when the body is invalid (the handler says why)
     """
-    Convert location string to coordinates.
-    Supports postal codes, city names, addresses for any country.
+    if not isinstance(payload, dict) or not payload.get('route'):
+        return None
+    try:
+        width_km = float(payload.get('width_km', 2))
+        if not 0 < width_km <= config.CORRIDOR_MAX_WIDTH_KM:
+            return None
+        return plan_corridor(payload['route'], width_km, corridor_cache.precision,
+                             config.CORRIDOR_TILE_REACH_KM, config.CORRIDOR_MAX_TILES)
+    except (TypeError, ValueError):
+        return None
+
+
+def request_cost(path: str, payload, plan=None) -> int:
+    """
+    Tokens a request costs: one per upstream lookup it can cause.
+
+    A batch costs one per distinct location, a corridor one per tile not
+    already cached; anything else (including bodies the handlers will
+    reject) costs one.
+    """
+    try:
+        if path == '/api/gas-prices/batch':
+            items = payload.get('locations') if isinstance(payload, dict) else payload
+            if not isinstance(items, list) or len(items) > config.BATCH_MAX_ITEMS:
+                return 1
+            return max(1, len({
+                batch_key({key: str(value) for key, value in item.items() if value is not None})[0]
+                for item in items if isinstance(item, dict)
+            }))
+        if path == '/api/gas-prices/corridor' and plan is not None:
+            _, tiles = plan
+            return max(1, sum(1 for tile in tiles
+                              if (left := corridor_cache.expires_in(tile)) is None or left <= 0))
+    except (TypeError, ValueError):
+        pass
+    return 1
+
+
+def check_rate_limit(path: str, client_ip: str, payload=None, plan=None):
+    """
+    Spend the request's cost (see request_cost) from the client's budget for a rate limited path.
+    Blocks on the shared bucket file: async callers run it in a thread.
 
     Args:
-        location: Location string (postal code, city, address)
-        country_code: Optional 2-letter country code (e.g., 'CA', 'US', 'GB')
+        path: Request path
+        client_ip: Client address the budget belongs to
+        payload: Decoded JSON body of a POST request
+        plan: corridor_plan's answer for a corridor request
 
     Returns:
-        Tuple of (latitude, longitude) or None if not found
+        None when the request may proceed, else (response body, Retry-After value)
     """
-    # Clean up the location string
-    location = location.strip()
+    if path not in RATE_LIMITED_PATHS:
+        return None
+    wait = rate_limiter.acquire(client_ip or "unknown", request_cost(path, payload, plan))
+    if not wait:
+        return None
+    seconds = retry_after(wait)
+    return {
+        "success": False,
+        "error": f"Rate limit exceeded. Try again in {seconds} seconds."
+    }, seconds
 
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {
-        "q": location,
-        "format": "json",
-        "limit": 1,
-        "addressdetails": 1
-    }
 
-    # Add country code if specified
-    if country_code:
-        params["countrycodes"] = country_code.upper()
+FUEL_TYPES = ('regular_gas', 'midgrade_gas', 'premium_gas', 'diesel')
+SORT_ORDERS = ('distance', 'price', 'value')
 
-    headers = {"User-Agent": "GasBuddy-International-API/1.0"}
 
-    try:
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+def shape_stations(results, distances=None) -> list[dict]:
+    """
+    Reshape parsed GasBuddy stations into the API's station objects.
 
-        if data:
-            return float(data[0]['lat']), float(data[0]['lon'])
-    except requests.RequestException as e:
-        print(f"Geocoding error: {e}")
-    except (ValueError, KeyError) as e:
-        print(f"Data parsing error: {e}")
+    Args:
+        results: Parsed Station records
+        distances: Optional km from the query point, parallel to ``results``
+    """
+    stations = []
+
+    for index, station in enumerate(results):
+        # Read the records' attributes: this loop runs for every station returned
+        products = station.prices
+        prices = {}
+        for fuel_type in FUEL_TYPES:
+            fuel_data = products.get(fuel_type)
+            if fuel_data is not None and fuel_data.price:
+                # Convert cents to dollars (GasBuddy uses cents per liter)
+                prices[fuel_type] = {
+                    "price": fuel_data.price / 100,
+                    "user": fuel_data.credit,
+                    "last_updated": fuel_data.last_updated
+                }
 
-    return None
+        if prices:
+            stations.append({
+                "station_id": station.station_id,
+                "name": "Unknown Station" if station.name is None else station.name,
+                "prices": prices,
+                "currency": station.currency,
+                "distance": round(distances[index], 3) if distances else None
+            })
 
+    return stations
 
-async def get_gas_prices_async(lat: float, lon: float, location: str, country: str = None):
+
+def rank_stations(stations: list[dict], sort: str = 'distance', fuel: str = None) -> list[dict]:
+    """
+    Order shaped stations (already nearest first) for the response.
+
+    Args:
+        stations: Output of shape_stations, with distances filled in
+        sort: 'distance', 'price' (of ``fuel``) or 'value' (price weighted by distance)
+        fuel: Only keep stations selling this fuel; ranking fuel for price/value
+            (defaults to regular_gas)
+    """
+    if fuel:
+        stations = [station for station in stations if fuel in station["prices"]]
+    if sort == 'distance':
+        return stations
+
+    fuel = fuel or 'regular_gas'
+    keyed = []
+    for station in stations:
+        price = (station["prices"].get(fuel) or {}).get("price")
+        if price is not None and sort == 'value':
+            price = price * (1 + config.VALUE_DISTANCE_WEIGHT * (station["distance"] or 0))
+            station["value_score"] = round(price, 4)
+        keyed.append((price is None, price or 0, station))
+    # Stable: equal keys keep nearest-first order; stations without the fuel go last
+    keyed.sort(key=lambda entry: entry[:2])
+    return [station for _, _, station in keyed]
+
+
+async def get_gas_prices_async(lat: float, lon: float, location: str, country: str = None,
+                               client: gasbuddy.GasBuddy = None, sort: str = 'distance',
+                               fuel: str = None, limit: int = 10):
     """
     Get gas prices using coordinates.
     Works internationally where GasBuddy data is available.
+
+    Pass a long-lived ``client`` to reuse its pooled connections across
+    requests; otherwise a client is opened for this call and closed after it.
+    Stations are ranked by ``sort`` (see rank_stations) and cut to ``limit``.
     """
-    client = gasbuddy.GasBuddy()
+    if client is None:
+        async with gasbuddy.GasBuddy(**CLIENT_HOOKS) as client:
+            return await get_gas_prices_async(lat, lon, location, country, client,
+                                              sort, fuel, limit)
 
     try:
-        # Get nearby gas stations (limit to 10 for performance)
-        nearby_prices = await client.price_lookup_service(lat=lat, lon=lon, limit=10)
+        # Every cached station of the tile, nearest first, ranked in one pass;
+        # distance order only needs the nearest ``limit``
+        nearby_prices = await price_cache.lookup(
+            client, lat, lon, limit=limit if sort == 'distance' and not fuel else None)
 
         if nearby_prices and nearby_prices.get('results'):
-            results = nearby_prices.get('results', [])
-            stations = []
-
-            for station in results:
-                station_data = {
-                    "station_id": station.get("station_id"),
-                    "name": station.get("name", "Unknown Station"),
-                    "prices": {},
-                    "currency": station.get("currency", "USD"),
-                    "distance": station.get("distance", None)
-                }
+            stations = shape_stations(nearby_prices['results'], nearby_prices['distances'])
+            stations = rank_stations(stations, sort, fuel)[:limit]
 
-                # Extract prices for each fuel type
-                for fuel_type in ['regular_gas', 'midgrade_gas', 'premium_gas', 'diesel']:
-                    fuel_data = station.get(fuel_type, {})
-                    if fuel_data and fuel_data.get('price'):
-                        # Convert cents to dollars (GasBuddy uses cents per liter)
-                        price_per_liter = fuel_data.get('price', 0) / 100
-                        station_data["prices"][fuel_type] = {
-                            "price": price_per_liter,
-                            "user": fuel_data.get('credit', 'Unknown'),
-                            "last_updated": fuel_data.get('last_updated', None)
-                        }
-
-                if station_data["prices"]:
-                    stations.append(station_data)
-
-            return {
+            result = {
                 "success": True,
                 "location": location,
                 "country": country or "Unknown",
                 "coordinates": {"lat": lat, "lon": lon},
                 "stations": stations,
                 "count": len(stations),
+                "sort": sort,
                 "source": "GasBuddy"
             }
+            if fuel:
+                result["fuel"] = fuel
+            if nearby_prices.get('stale'):
+                # Served from cache while GasBuddy is unavailable
+                result["stale"] = True
+            if nearby_prices.get('indexed'):
+                # Last known prices from the station index; the tile is being refreshed
+                result["indexed"] = True
+            return result
         else:
             return {
                 "success": False,
                 "error": f"No gas stations found near {location}"
             }
 
+    except (CircuitOpenError, OverloadedError):
+        return {
+            "success": False,
+            "error": "GasBuddy is temporarily unavailable, please try again shortly"
+        }
     except Exception as e:
         return {
             "success": False,
@@ -126,19 +371,59 @@ async def get_gas_prices_async(lat: float, lon: float, location: str, country: s
         }
 
 
-@app.route('/api/gas-prices', methods=['GET'])
-async def get_gas_prices():
+async def handle_gas_prices(args, client: gasbuddy.GasBuddy,
+                            timings: RequestTimings = None) -> tuple[dict, int]:
     """
-    API endpoint for gas prices by location.
-    Supports postal codes, city names, addresses for any country.
+    Resolve a gas-price query.
+    Shared by the Flask view and the ASGI app (asgi.py).
+
+    Args:
+        args: Query parameters (location, postal_code, city, country, lat, lon)
+        client: GasBuddy client to query with
+        timings: Collects the per-phase durations for the Server-Timing header
+
+    Returns:
+        Tuple of (response body, HTTP status)
     """
+    if timings is None:
+        timings = RequestTimings()
+    activate(timings)
+    body, status = await _resolve_gas_prices(args, client, timings)
+    if config.DEBUG:
+        body["timing"] = timings.to_dict()
+    return body, status
+
+
+async def _resolve_gas_prices(args, client: gasbuddy.GasBuddy,
+                              timings: RequestTimings) -> tuple[dict, int]:
+    """Body of handle_gas_prices."""
     # Get parameters - support multiple location formats
-    location = request.args.get('location')  # Generic location parameter
-    postal_code = request.args.get('postal_code')  # Legacy support
-    city = request.args.get('city')  # City name
-    country_code = request.args.get('country')  # 2-letter country code
-    lat = request.args.get('lat')  # Direct latitude
-    lon = request.args.get('lon')  # Direct longitude
+    location = args.get('location')  # Generic location parameter
+    postal_code = args.get('postal_code')  # Legacy support
+    city = args.get('city')  # City name
+    country_code = args.get('country')  # 2-letter country code
+    lat = args.get('lat')  # Direct latitude
+    lon = args.get('lon')  # Direct longitude
+    sort = args.get('sort') or 'distance'  # distance, price or value
+    fuel = args.get('fuel')  # regular_gas, midgrade_gas, premium_gas or diesel
+
+    if sort not in SORT_ORDERS:
+        return {
+            "success": False,
+            "error": f"sort must be one of: {', '.join(SORT_ORDERS)}"
+        }, 400
+    if fuel and fuel not in FUEL_TYPES:
+        return {
+            "success": False,
+            "error": f"fuel must be one of: {', '.join(FUEL_TYPES)}"
+        }, 400
+    try:
+        limit = max(1, min(int(args.get('limit') or 10), config.MAX_RESULTS))
+    except ValueError:
+        return {
+            "success": False,
+            "error": "limit must be a whole number"
+        }, 400
 
     # Determine the location string to use
     if location:
@@ -155,15 +440,15 @@ async def get_gas_prices():
             # Use reverse geocoding to get location name
             location_string = f"{lat_float},{lon_float}"
         except ValueError:
-            return jsonify({
+            return {
                 "success": False,
                 "error": "Invalid latitude or longitude values"
-            }), 400
+            }, 400
     else:
-        return jsonify({
+        return {
             "success": False,
             "error": "Please provide one of: location, postal_code, city, or lat/lon coordinates"
-        }), 400
+        }, 400
 
     # Get coordinates
     if lat and lon:
@@ -171,48 +456,264 @@ async def get_gas_prices():
         try:
             coordinates = (float(lat), float(lon))
         except ValueError:
-            return jsonify({
+            return {
                 "success": False,
                 "error": "Invalid latitude or longitude values"
-            }), 400
+            }, 400
     else:
-        # Geocode the location
-        coordinates = geocode_location(location_string, country_code)
+        # Geocode the location while the CSRF token is fetched on the same pool
+        geocoder = Geocoder(session=client.session, cache=geocode_cache,
+                            gazetteer=gazetteer)
+        coordinates, _ = await asyncio.gather(
+            timings.measure("geocode", geocoder.geocode(location_string, country_code)),
+            client.ensure_token(),
+            return_exceptions=True,
+        )
+        if isinstance(coordinates, BaseException):
+            raise coordinates
 
     if not coordinates:
-        return jsonify({
+        return {
             "success": False,
             "error": f"Could not find coordinates for location: {location_string}"
-        }), 404
+        }, 404
 
     lat_coord, lon_coord = coordinates
 
     try:
         # Get gas prices asynchronously
-        result = await get_gas_prices_async(lat_coord, lon_coord, location_string, country_code)
-        return jsonify(result)
+        result = await get_gas_prices_async(lat_coord, lon_coord, location_string, country_code,
+                                            client=client, sort=sort, fuel=fuel, limit=limit)
+        return result, 200
     except Exception as e:
-        return jsonify({
+        return {
             "success": False,
             "error": f"Internal server error: {str(e)}"
-        }), 500
+        }, 500
 
 
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    """Health check endpoint."""
-    return jsonify({
+def batch_key(args: dict) -> tuple:
+    """
+    Key under which identical batch queries are resolved once.
+
+    Returns:
+        (location key, ranking key): the same place asked with a different
+        sort, fuel or limit is a separate query (its tile is still shared)
+    """
+    if args.get('lat') and args.get('lon'):
+        try:
+            location = ("coordinates", round(float(args['lat']), 5), round(float(args['lon']), 5))
+        except ValueError:
+            location = ("coordinates", args['lat'], args['lon'])
+    else:
+        text = args.get('location') or args.get('postal_code') or args.get('city') or ""
+        location = ("location", normalize_location(text, args.get('country')))
+
+    try:
+        limit = max(1, min(int(args.get('limit') or 10), config.MAX_RESULTS))
+    except ValueError:
+        limit = args['limit']  # rejected by _resolve_gas_prices
+    return location, (args.get('sort') or 'distance', args.get('fuel') or None, limit)
+
+
+async def handle_gas_prices_batch(payload, client: gasbuddy.GasBuddy,
+                                  timings: RequestTimings = None) -> tuple[dict, int]:
+    """
+    Resolve many gas-price queries in one request.
+    Shared by the Flask view and the ASGI app (asgi.py).
+
+    Args:
+        payload: Decoded JSON body, ``{"locations": [...]}`` or the list itself;
+            each item takes the same fields as the GET endpoint's query string
+        client: GasBuddy client to query with
+        timings: Collects the per-phase durations for the Server-Timing header
+
+    Returns:
+        Tuple of (response body, HTTP status)
+    """
+    if timings is None:
+        timings = RequestTimings()
+    activate(timings)
+
+    items = payload.get('locations') if isinstance(payload, dict) else payload
+    if not isinstance(items, list) or not items:
+        return {
+            "success": False,
+            "error": 'Please provide a JSON body like {"locations": [{"postal_code": "90210"}, ...]}'
+        }, 400
+    if len(items) > config.BATCH_MAX_ITEMS:
+        return {
+            "success": False,
+            "error": f"Too many locations: at most {config.BATCH_MAX_ITEMS} per batch"
+        }, 400
+
+    # Query-string semantics: every value is a string, missing values are dropped
+    queries = [
+        {key: str(value) for key, value in item.items() if value is not None}
+        if isinstance(item, dict) else None
+        for item in items
+    ]
+    unique = {}
+    for args in queries:
+        if args is not None:
+            unique.setdefault(batch_key(args), args)
+    semaphore = asyncio.Semaphore(config.BATCH_CONCURRENCY)
+
+    async def resolve(args):
+        async with semaphore:
+            try:
+                return await _resolve_gas_prices(args, client, timings)
+            except Exception as e:
+                return {
+                    "success": False,
+                    "error": f"Internal server error: {str(e)}"
+                }, 500
+
+    answers = dict(zip(unique, await asyncio.gather(*(resolve(args) for args in unique.values()))))
+
+    results = []
+    for index, args in enumerate(queries):
+        if args is None:
+            body, status = {"success": False, "error": "Each location must be a JSON object"}, 400
+        else:
+            body, status = answers[batch_key(args)]
+        results.append({"index": index, "status": status, **body})
+
+    body = {
+        "success": True,
+        "count": len(results),
+        "unique_locations": len({location for location, _ in unique}),
+        "unique_queries": len(unique),
+        "succeeded": sum(1 for result in results if result.get("success")),
+        "results": results
+    }
+    if config.DEBUG:
+        body["timing"] = timings.to_dict()
+    return body, 200
+
+
+def fuel_price(station: dict, fuel: str):
+    """Price of ``fuel`` at a shaped station, or None when it has none."""
+    return (station["prices"].get(fuel) or {}).get("price")
+
+
+async def handle_corridor(payload, client: gasbuddy.GasBuddy, timings: RequestTimings = None,
+                          plan=None) -> tuple[dict, int]:
+    """
+    Find stations along a route.
+    Shared by the Flask view and the ASGI app (asgi.py).
+
+    Args:
+        payload: Decoded JSON body with ``route`` (encoded polyline or list of
+            [lat, lon] points), ``width_km``, ``sort`` (price or detour),
+            ``fuel`` and ``limit``
+        client: GasBuddy client to query with
+        timings: Collects the per-phase durations for the Server-Timing header
+        plan: corridor_plan's answer, when the rate limit check already made it
+
+    Returns:
+        Tuple of (response body, HTTP status)
+    """
+    if timings is None:
+        timings = RequestTimings()
+    activate(timings)
+
+    if not isinstance(payload, dict) or not payload.get('route'):
+        return {
+            "success": False,
+            "error": 'Please provide a JSON body like {"route": "<encoded polyline>", "width_km": 2}'
+        }, 400
+    try:
+        width_km = float(payload.get('width_km', 2))
+        limit = int(payload.get('limit', 50))
+    except (TypeError, ValueError):
+        return {"success": False, "error": "width_km and limit must be numbers"}, 400
+    if not 0 < width_km <= config.CORRIDOR_MAX_WIDTH_KM:
+        return {
+            "success": False,
+            "error": f"width_km must be between 0 and {config.CORRIDOR_MAX_WIDTH_KM}"
+        }, 400
+    sort = payload.get('sort', 'price')
+    if sort not in ('price', 'detour'):
+        return {"success": False, "error": "sort must be 'price' or 'detour'"}, 400
+    fuel = payload.get('fuel', 'regular_gas')
+    if fuel not in FUEL_TYPES:
+        return {
+            "success": False,
+            "error": f"fuel must be one of: {', '.join(FUEL_TYPES)}"
+        }, 400
+
+    try:
+        found = await corridor_search(
+            client, corridor_cache, payload['route'], width_km,
+            reach_km=config.CORRIDOR_TILE_REACH_KM,
+            concurrency=config.CORRIDOR_CONCURRENCY,
+            max_tiles=config.CORRIDOR_MAX_TILES,
+            plan=plan,
+        )
+    except ValueError as e:
+        return {"success": False, "error": str(e)}, 400
+
+    stations = []
+    for station, offset_km, along_km in found["stations"]:
+        shaped = shape_stations([station])
+        if not shaped:
+            continue
+        shaped = shaped[0]
+        shaped["distance"] = round(offset_km, 3)
+        shaped["detour_km"] = round(2 * offset_km, 3)
+        shaped["route_km"] = round(along_km, 3)
+        stations.append(shaped)
+
+    if sort == 'price':
+        # Stations without the requested fuel go last, in route order
+        stations.sort(key=lambda station: (fuel_price(station, fuel) is None,
+                                           fuel_price(station, fuel) or 0))
+    else:
+        stations.sort(key=lambda station: station["detour_km"])
+
+    body = {
+        "success": True,
+        "route_km": round(found["length_km"], 3),
+        "width_km": width_km,
+        "sort": sort,
+        "fuel": fuel,
+        "stations": stations[:max(limit, 0)],
+        "count": min(len(stations), max(limit, 0)),
+        "tiles_queried": found["tiles"],
+        "tiles_failed": found["failed_tiles"],
+        "source": "GasBuddy"
+    }
+    if found["stale"]:
+        body["stale"] = True
+    if config.DEBUG:
+        body["timing"] = timings.to_dict()
+    return body, 200
+
+
+def health_payload() -> dict:
+    """Body of the health check endpoint."""
+    return {
         "status": "healthy",
         "service": "GasBuddy International API",
         "version": "2.0",
-        "supported_features": ["International geocoding", "Multiple location formats", "Real-time gas prices"]
-    })
+        "supported_features": ["International geocoding", "Multiple location formats", "Real-time gas prices"],
+        "caches": {
+            "geocode": geocode_cache.stats(),
+            "gazetteer": gazetteer.stats() if gazetteer else None,
+            "prices": price_cache.stats(),
+            "corridor": corridor_cache.stats(),
+            "stations": station_index.stats(),
+            "hot_tiles": hot_tiles.stats()
+        },
+        "rate_limit": rate_limiter.stats(),
+        "upstream": {**gasbuddy.coalescing_stats(), **gasbuddy.upstream_health()}
+    }
 
 
-@app.route('/', methods=['GET'])
-def home():
-    """API documentation."""
-    return jsonify({
+def home_payload() -> dict:
+    """Body of the API documentation endpoint."""
+    return {
         "name": "GasBuddy International API",
         "description": "Get gas prices by location for any country",
         "version": "2.0",
@@ -221,9 +722,13 @@ def home():
             "/api/gas-prices?postal_code=L6Y4V3": "Get gas prices by postal code",
             "/api/gas-prices?city=London&country=GB": "Get gas prices by city and country",
             "/api/gas-prices?lat=40.7128&lon=-74.0060": "Get gas prices by coordinates",
-            "/api/health": "Health check"
+            "/api/gas-prices?postal_code=90210&sort=price&fuel=diesel": "Cheapest diesel nearby (sort: distance, price or value)",
+            "POST /api/gas-prices/batch": "Get gas prices for a list of locations",
+            "POST /api/gas-prices/corridor": "Get gas prices along a route",
+            "/api/health": "Health check",
+            "/api/metrics": "Prometheus metrics for this worker"
         },
-        "supported_countries": ["US", "CA", "GB", "AU", "DE", "FR", "IT", "ES", "NL", "BE", "AT", "CH"],
+        "supported_countries": config.SUPPORTED_COUNTRIES,
         "examples": [
             "GET /api/gas-prices?location=New York, NY",
             "GET /api/gas-prices?city=Toronto&country=CA",
@@ -231,7 +736,92 @@ def home():
             "GET /api/gas-prices?lat=51.5074&lon=-0.1278"
         ],
         "note": "GasBuddy data availability varies by country and region"
-    })
+    }
+
+
+@app.before_request
+def enforce_rate_limit():
+    """Reject clients over RATE_LIMIT with 429 and Retry-After."""
+    # remote_addr is the real client IP once ProxyFix has applied X-Forwarded-For
+    payload = request.get_json(silent=True) if request.method == 'POST' else None
+    plan = None
+    if request.path == '/api/gas-prices/corridor':
+        # Kept for the view, so the route is planned once
+        plan = g.corridor_plan = corridor_plan(payload)
+    limited = check_rate_limit(request.path, request.remote_addr, payload, plan)
+    if limited is not None:
+        body, seconds = limited
+        response = jsonify(body)
+        response.status_code = 429
+        response.headers["Retry-After"] = seconds
+        return response
+
+
+@app.route('/api/gas-prices', methods=['GET'])
+def get_gas_prices():
+    """
+    API endpoint for gas prices by location.
+    Supports postal codes, city names, addresses for any country.
+    """
+    start_hot_tiles()
+    timings = RequestTimings()
+    body, status = background.run(handle_gas_prices(request.args.to_dict(), background.client,
+                                                    timings))
+    return timed_response(body, status, timings)
+
+
+@app.route('/api/gas-prices/batch', methods=['POST'])
+def get_gas_prices_batch():
+    """
+    API endpoint for many locations at once.
+    Body: {"locations": [{"postal_code": "90210"}, {"city": "London", "country": "GB"}, ...]}
+    """
+    start_hot_tiles()
+    timings = RequestTimings()
+    body, status = background.run(handle_gas_prices_batch(request.get_json(silent=True),
+                                                          background.client, timings))
+    return timed_response(body, status, timings)
+
+
+@app.route('/api/gas-prices/corridor', methods=['POST'])
+def get_gas_prices_corridor():
+    """
+    API endpoint for stations along a route.
+    Body: {"route": "<encoded polyline>" or [[lat, lon], ...], "width_km": 2, "sort": "price"}
+    """
+    timings = RequestTimings()
+    body, status = background.run(handle_corridor(request.get_json(silent=True),
+                                                  background.client, timings,
+                                                  plan=g.get('corridor_plan')))
+    return timed_response(body, status, timings)
+
+
+def timed_response(body: dict, status: int, timings: RequestTimings):
+    """Serialize a response and attach its Server-Timing header."""
+    started = time.perf_counter()
+    response = jsonify(body)
+    response.status_code = status
+    timings.add("serialize", time.perf_counter() - started)
+    response.headers["Server-Timing"] = timings.header()
+    return response
+
+
+@app.route('/api/health', methods=['GET'])
+def health_check():
+    """Health check endpoint."""
+    return jsonify(health_payload())
+
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics endpoint."""
+    return Response(REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
+
+
+@app.route('/', methods=['GET'])
+def home():
+    """API documentation."""
+    return jsonify(home_payload())
 
 
 # For local development testing only
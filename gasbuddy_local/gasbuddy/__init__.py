@@ -1,76 +1,355 @@
 """GasBuddy API wrapper."""
 
 import asyncio
-import json
+import functools
 import logging
 import re
-from typing import Any, Collection
+import time
+import weakref
+from typing import Any, AsyncIterator, Collection
 
 import aiohttp
 from aiohttp.client_exceptions import ContentTypeError, ServerTimeoutError
 import backoff
 
+from . import codec, metrics
 from .consts import (
     BASE_URL,
+    BREAKER_FAILURE_RATIO,
+    BREAKER_MIN_CALLS,
+    BREAKER_RESET_TIMEOUT,
+    BREAKER_WINDOW,
+    CONCURRENCY_INITIAL,
+    CONCURRENCY_LATENCY_TARGET,
+    CONCURRENCY_MAX,
+    CONCURRENCY_MAX_WAIT,
+    CONCURRENCY_MAX_WAITING,
+    CONCURRENCY_MIN,
+    CONNECTOR_LIMIT,
+    CONNECTOR_LIMIT_PER_HOST,
+    CSRF_CHUNK_SIZE,
+    CSRF_SCAN_OVERLAP,
+    CSRF_TOKEN_TTL,
     DEFAULT_HEADERS,
+    DNS_CACHE_TTL,
     GAS_PRICE_QUERY,
+    HOME_URL,
+    KEEPALIVE_TIMEOUT,
     LOCATION_QUERY,
     LOCATION_QUERY_PRICES,
+    LOCATION_QUERY_PRICES_PAGED,
+    REQUEST_CONNECT_TIMEOUT,
+    REQUEST_READ_TIMEOUT,
+    REQUEST_TIMEOUT,
+    STATION_BATCH_CONCURRENCY,
+    STATION_BATCH_SIZE,
+    STATION_FIELDS,
 )
+from .csrf import CSRFTokenCache
 from .exceptions import APIError, CSRFTokenMissing, LibraryError, MissingSearchData
+from .hooks import Hook
+from .limiter import AdaptiveLimiter, CircuitBreaker, is_overload
+from .models import Station, parse_station
+from .singleflight import SingleFlight
 
 __version__ = "0.3.8"
 
+# Applied to every upstream request, including on sessions passed in by callers.
+_TIMEOUT = aiohttp.ClientTimeout(
+    total=REQUEST_TIMEOUT,
+    connect=REQUEST_CONNECT_TIMEOUT,
+    sock_read=REQUEST_READ_TIMEOUT,
+)
+
+CSRF_PATTERN = re.compile(rb'window\.gbcsrf\s*=\s*(["])(.*?)\1')
+
+
+@functools.lru_cache(maxsize=32)
+def _batch_station_query(count: int) -> str:
+    """Return a GetStations document with ``count`` aliased station fields."""
+    params = ", ".join(f"$id{i}: ID!" for i in range(count))
+    fields = " ".join(
+        f"s{i}: station(id: $id{i}) {{ {STATION_FIELDS} }}" for i in range(count)
+    )
+    return f"query GetStations({params}) {{ {fields} }}"
+
+
+# Shared by every client in the process so the home page is scraped once per TTL.
+_CSRF_CACHE = CSRFTokenCache()
+# Identical GraphQL requests in flight at the same time share one upstream call.
+_IN_FLIGHT = SingleFlight()
+# Every client in the process stops calling GasBuddy while it is failing.
+_BREAKER = CircuitBreaker(
+    BREAKER_WINDOW, BREAKER_MIN_CALLS, BREAKER_FAILURE_RATIO, BREAKER_RESET_TIMEOUT
+)
+# Adaptive in-flight limits, one per event loop (their waiters are loop-bound).
+_LIMITERS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AdaptiveLimiter]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _limiter() -> AdaptiveLimiter:
+    """Return the running loop's concurrency limiter."""
+    loop = asyncio.get_running_loop()
+    limiter = _LIMITERS.get(loop)
+    if limiter is None:
+        limiter = _LIMITERS[loop] = AdaptiveLimiter(
+            CONCURRENCY_INITIAL,
+            CONCURRENCY_MIN,
+            CONCURRENCY_MAX,
+            CONCURRENCY_LATENCY_TARGET,
+            max_waiting=CONCURRENCY_MAX_WAITING,
+            max_wait=CONCURRENCY_MAX_WAIT,
+        )
+    return limiter
+
+
+def coalescing_stats() -> dict[str, dict[str, int]]:
+    """Return single-flight counters for GraphQL requests and CSRF refreshes."""
+    return {"graphql": _IN_FLIGHT.stats(), "csrf": _CSRF_CACHE.stats()}
+
+
+def upstream_health() -> dict[str, Any]:
+    """Return the circuit breaker state and the adaptive concurrency limits."""
+    return {
+        "circuit": _BREAKER.stats(),
+        "concurrency": [limiter.stats() for limiter in list(_LIMITERS.values())],
+    }
+
+
+def _coalescing_metrics():
+    """Expose the single-flight counters through the metrics registry."""
+    stats = coalescing_stats()
+    yield (
+        "gasbuddy_singleflight_calls_total",
+        "counter",
+        "Upstream calls actually made, by kind.",
+        [({"kind": kind}, value["calls"]) for kind, value in stats.items()],
+    )
+    yield (
+        "gasbuddy_singleflight_coalesced_total",
+        "counter",
+        "Callers that shared an in-flight upstream call, by kind.",
+        [({"kind": kind}, value["coalesced"]) for kind, value in stats.items()],
+    )
+
+
+metrics.REGISTRY.register_collector(_coalescing_metrics)
+
+
+def _upstream_metrics():
+    """Expose the circuit breaker and concurrency limits through the registry."""
+    health = upstream_health()
+    circuit = health["circuit"]
+    yield (
+        "gasbuddy_circuit_open",
+        "gauge",
+        "1 while the circuit breaker rejects calls.",
+        [({}, int(circuit["state"] != CircuitBreaker.CLOSED))],
+    )
+    yield (
+        "gasbuddy_circuit_rejected_total",
+        "counter",
+        "Calls failed fast by the circuit breaker.",
+        [({}, circuit["rejected"])],
+    )
+    yield (
+        "gasbuddy_concurrency_limit",
+        "gauge",
+        "Adaptive limit on GraphQL requests in flight.",
+        [({}, sum(limiter["limit"] for limiter in health["concurrency"]))],
+    )
+    yield (
+        "gasbuddy_concurrency_shed_total",
+        "counter",
+        "Calls failed fast because too many were queued or waited too long.",
+        [({}, sum(limiter["shed"] for limiter in health["concurrency"]))],
+    )
+
+
+metrics.REGISTRY.register_collector(_upstream_metrics)
+
+
+async def _on_backoff(details: dict) -> None:
+    """Count a retry and pass it to the client's ``on_retry`` hook."""
+    metrics.record_backoff(details)
+    client = details["args"][0]
+    if client._on_retry is not None:
+        if details["target"].__name__ == "_fetch_token":
+            operation = "csrf"
+        else:
+            operation = details["args"][2]
+        await client._on_retry(
+            operation=operation,
+            tries=details["tries"],
+            wait=details["wait"],
+            error=details.get("exception"),
+        )
+
+
 class GasBuddy:
     """Represent GasBuddy GraphQL calls."""
 
     def __init__(
-        self, station_id: int | None = None, solver_url: str | None = None
+        self,
+        station_id: int | None = None,
+        solver_url: str | None = None,
+        session: aiohttp.ClientSession | None = None,
+        csrf_ttl: float = CSRF_TOKEN_TTL,
+        coalesce: bool = True,
+        on_request_start: Hook | None = None,
+        on_response: Hook | None = None,
+        on_retry: Hook | None = None,
+        on_parse_done: Hook | None = None,
     ) -> None:
-        """Connect and request data from GasBuddy."""
+        """Connect and request data from GasBuddy; see ``hooks`` for the hooks."""
         self._url = BASE_URL
         self._id = station_id
         self._solver = solver_url
         self._tag = ""
+        self._csrf_ttl = csrf_ttl
+        self._coalesce = coalesce
+        self._session = session
+        self._owns_session = session is None
+        self._on_request_start = on_request_start
+        self._on_response = on_response
+        self._on_retry = on_retry
+        self._on_parse_done = on_parse_done
+
+    async def __aenter__(self) -> "GasBuddy":
+        """Enter the client context."""
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """Close the pooled session on exit."""
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Return the pooled session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=CONNECTOR_LIMIT,
+                limit_per_host=CONNECTOR_LIMIT_PER_HOST,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=_TIMEOUT)
+            self._owns_session = True
+        return self._session
+
+    async def close(self) -> None:
+        """Close the pooled session if this client created it."""
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+        self._session = None
 
-    @backoff.on_exception(
-        backoff.expo, aiohttp.ClientError, max_time=60, max_tries=5
-    )
     async def process_request(
         self, query: dict[str, Collection[str]]
     ) -> dict[str, Any]:
         """Process API requests."""
-        headers = DEFAULT_HEADERS.copy()
-        await self._get_headers()
-        headers["gbcsrf"] = self._tag
+        json_query: bytes = codec.dumps(query, sort_keys=True)
+        operation = str(query.get("operationName") or "unknown")
+        if self._on_request_start is not None:
+            await self._on_request_start(operation=operation, size=len(json_query))
+        if not self._coalesce:
+            return await self._send(json_query, operation)
+        # The serialized document covers operation name, query and variables.
+        return await _IN_FLIGHT.do(
+            json_query, lambda: self._send(json_query, operation)
+        )
 
-        async with aiohttp.ClientSession(headers=headers) as session:
-            json_query: str = json.dumps(query)
-            try:
-                async with session.post(self._url, data=json_query) as response:
-                    message: dict[str, Any] | Any = {}
-                    try:
-                        message = await response.text()
-                    except UnicodeDecodeError:
-                        message = data.decode(errors="replace")
-
-                    try:
-                        message = json.loads(message)
-                    except ValueError:
-                        message = {"error": message}
-                    if response.status == 403:
-                        pass
-                    elif response.status != 200:
-                        message = {"error": message}
-                    return message
-
-            except (TimeoutError, ServerTimeoutError):
-                message = {"error": "Timeout while updating"}
-            except ContentTypeError as err:
-                message = {"error": err}
-
-            await session.close()
-            return message
+    @backoff.on_exception(
+        backoff.expo,
+        aiohttp.ClientError,
+        max_time=60,
+        max_tries=5,
+        on_backoff=_on_backoff,
+    )
+    async def _send(self, json_query: bytes, operation: str) -> dict[str, Any]:
+        """Send a GraphQL document, retrying once on a stale CSRF token."""
+        _BREAKER.check()
+        token = await self.ensure_token()
+        status, message = await self._post(json_query, token, operation)
+        if status == 403:
+            # The token was probably rotated upstream; retry once with a fresh one.
+            _CSRF_CACHE.invalidate(token)
+            token = await self.ensure_token()
+            status, message = await self._post(json_query, token, operation)
+        return message
+
+    async def _post(
+        self, json_query: bytes, token: str, operation: str = "unknown"
+    ) -> tuple[int | None, Any]:
+        """Send one GraphQL document and return the status and decoded body."""
+        headers = DEFAULT_HEADERS.copy()
+        headers["gbcsrf"] = token
+        limiter = _limiter()
+        granted = await limiter.acquire()
+        overloaded: bool | None = None
+        started = time.perf_counter()
+        status = "timeout"
+        try:
+            async with self.session.post(
+                self._url, data=json_query, headers=headers, timeout=_TIMEOUT
+            ) as response:
+                message: dict[str, Any] | Any = {}
+                body = await response.read()
+                status = str(response.status)
+                overloaded = is_overload(response.status)
+                metrics.GRAPHQL_BYTES.labels(operation).observe(len(body))
+                if self._on_response is not None:
+                    await self._on_response(
+                        operation=operation,
+                        status=response.status,
+                        size=len(body),
+                        elapsed=time.perf_counter() - started,
+                    )
+
+                decode_started = time.perf_counter()
+                try:
+                    message = codec.loads(body)
+                except ValueError:
+                    message = {"error": body.decode(errors="replace")}
+                if self._on_parse_done is not None:
+                    await self._on_parse_done(
+                        operation=operation,
+                        stage="decode",
+                        count=len(body),
+                        elapsed=time.perf_counter() - decode_started,
+                    )
+                if response.status == 403:
+                    pass
+                elif response.status != 200:
+                    message = {"error": message}
+                return response.status, message
+
+        except (TimeoutError, ServerTimeoutError):
+            message = {"error": "Timeout while updating"}
+            overloaded = True
+            if self._on_response is not None:
+                await self._on_response(
+                    operation=operation,
+                    status=None,
+                    size=0,
+                    elapsed=time.perf_counter() - started,
+                )
+        except ContentTypeError as err:
+            message = {"error": err}
+        except aiohttp.ClientError:
+            status = "error"
+            overloaded = True
+            raise
+        finally:
+            limiter.release(granted, overloaded)
+            if overloaded is not None:
+                _BREAKER.record(overloaded)
+            metrics.GRAPHQL_SECONDS.labels(operation).observe(
+                time.perf_counter() - started
+            )
+            metrics.GRAPHQL_RESPONSES.labels(operation, status).inc()
+
+        return None, message
 
     async def location_search(
         self,
@@ -95,7 +374,7 @@ class GasBuddy:
 
         return await self.process_request(query)
 
-    async def price_lookup(self) -> dict[str, Any] | None:
+    async def price_lookup(self) -> Station | None:
         """Return gas price of station_id."""
         query = {
             "operationName": "GetStation",
@@ -117,48 +396,57 @@ class GasBuddy:
                     message = "Server side error occured."
             raise APIError
 
-        data = {}
-
-        data["station_id"] = response["data"]["station"]["id"]
-        data["unit_of_measure"] = response["data"]["station"]["priceUnit"]
-        data["currency"] = response["data"]["station"]["currency"]
-        data["latitude"] = response["data"]["station"]["latitude"]
-        data["longitude"] = response["data"]["station"]["longitude"]
-        data["image_url"] = None
-
-        if len(response["data"]["station"]["brands"]) > 0:
-            data["image_url"] = response["data"]["station"]["brands"][0]["imageUrl"]
-
-        prices = response["data"]["station"]["prices"]
-        for price in prices:
-            index = price["fuelProduct"]
-            if price["cash"]:
-                data[index] = {
-                    "credit": price["credit"]["nickname"],
-                    "cash_price": (
-                        None
-                        if price.get("cash", {}).get("price", 0) == 0
-                        else price["cash"]["price"]
-                    ),
-                    "price": (
-                        None
-                        if price.get("credit", {}).get("price", 0) == 0
-                        else price["credit"]["price"]
-                    ),
-                    "last_updated": price["credit"]["postedTime"],
-                }
-            else:
-                data[index] = {
-                    "credit": price["credit"]["nickname"],
-                    "price": (
-                        None
-                        if price.get("credit", {}).get("price", 0) == 0
-                        else price["credit"]["price"]
-                    ),
-                    "last_updated": price["credit"]["postedTime"],
-                }
-
-        return data
+        return parse_station(response["data"]["station"])
+
+    async def price_lookup_many(
+        self,
+        station_ids: Collection[int | str],
+        batch_size: int = STATION_BATCH_SIZE,
+        concurrency: int = STATION_BATCH_CONCURRENCY,
+    ) -> dict[str, Station | None]:
+        """Return gas prices of many stations, keyed by station id.
+
+        Stations are packed into aliased GetStation fields, ``batch_size`` per
+        document, with at most ``concurrency`` documents in flight. Each value
+        has the shape ``price_lookup`` returns, or None for unknown stations.
+        """
+        ids = list(dict.fromkeys(str(station_id) for station_id in station_ids))
+        chunks = [ids[i : i + batch_size] for i in range(0, len(ids), batch_size)]
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def lookup(chunk: list[str]) -> dict[str, Station | None]:
+            async with semaphore:
+                return await self._price_lookup_batch(chunk)
+
+        results: dict[str, Station | None] = {}
+        for batch in await asyncio.gather(*(lookup(chunk) for chunk in chunks)):
+            results.update(batch)
+        return {station_id: results.get(station_id) for station_id in ids}
+
+    async def _price_lookup_batch(
+        self, station_ids: list[str]
+    ) -> dict[str, Station | None]:
+        """Return gas prices of one chunk of stations."""
+        query = {
+            "operationName": "GetStations",
+            "query": _batch_station_query(len(station_ids)),
+            "variables": {f"id{i}": station_id for i, station_id in enumerate(station_ids)},
+        }
+
+        response = await self.process_request(query)
+
+        if "error" in response.keys():
+            raise LibraryError
+        data = response.get("data") or {}
+        if "errors" in response.keys() and not data:
+            raise APIError
+
+        return {
+            station_id: (
+                parse_station(data[f"s{i}"]) if data.get(f"s{i}") else None
+            )
+            for i, station_id in enumerate(station_ids)
+        }
 
     async def price_lookup_service(
         self,
@@ -194,66 +482,124 @@ class GasBuddy:
             value["trend"] = trend_data
         return value
 
+    async def iter_stations(
+        self,
+        lat: float | None = None,
+        lon: float | None = None,
+        zipcode: int | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[Station]:
+        """Yield stations near a location, fetching one result page at a time.
+
+        The next page is only requested once the caller has consumed the
+        current one, so at most one page is held in memory.
+        """
+        variables: dict[str, Any] = {}
+        if lat is not None and lon is not None:
+            variables = {"maxAge": 0, "lat": lat, "lng": lon}
+        elif zipcode is not None:
+            variables = {"maxAge": 0, "search": str(zipcode)}
+        else:
+            raise MissingSearchData
+
+        remaining = limit
+        cursor: str | None = None
+        while remaining is None or remaining > 0:
+            if cursor is not None:
+                variables["cursor"] = cursor
+            query = {
+                "operationName": "LocationBySearchTerm",
+                "query": LOCATION_QUERY_PRICES_PAGED,
+                "variables": variables,
+            }
+
+            response = await self.process_request(query)
+
+            if "error" in response.keys():
+                raise LibraryError
+            if "errors" in response.keys():
+                raise APIError
+
+            page = response["data"]["locationBySearchTerm"]["stations"]
+            results = await self._parse_results(
+                response, len(page["results"]) if remaining is None else remaining
+            )
+            for station in results:
+                yield station
+            if remaining is not None:
+                remaining -= len(results)
+
+            cursor = (page.get("cursor") or {}).get("next")
+            if not cursor or not results:
+                return
+
     async def _parse_trends(self, response: dict) -> dict | None:
         """Parse API results and return trend dict."""
+        started = time.perf_counter() if self._on_parse_done is not None else 0.0
         trend_data: dict[str, Any] = {}
         if response["data"]["locationBySearchTerm"]["trends"][0]:
             result = response["data"]["locationBySearchTerm"]["trends"][0]
             trend_data["average_price"] = result["today"]
             trend_data["lowest_price"] = result["todayLow"]
             trend_data["area"] = result["areaName"]
+        if self._on_parse_done is not None:
+            await self._on_parse_done(
+                operation="LocationBySearchTerm",
+                stage="trends",
+                count=1 if trend_data else 0,
+                elapsed=time.perf_counter() - started,
+            )
         return trend_data
 
-    async def _parse_results(self, response: dict, limit: int) -> list:
+    async def _parse_results(self, response: dict, limit: int) -> list[Station]:
         """Parse API results and return price data list."""
-        result_list = []
-        for result in response["data"]["locationBySearchTerm"]["stations"]["results"]:
-            if limit <= 0:
-                break
-            limit -= 1
-            price_data = {}
-            price_data["station_id"] = result["id"]
-            price_data["unit_of_measure"] = result["priceUnit"]
-            price_data["currency"] = result["currency"]
-            price_data["latitude"] = result["latitude"]
-            price_data["longitude"] = result["longitude"]
-            price_data["name"] = result.get("name", "Unknown Station")
-
-            for price in result["prices"]:
-                index = price["fuelProduct"]
-                if price["cash"]:
-                    price_data[index] = {
-                        "credit": price["credit"]["nickname"],
-                        "cash_price": (
-                            None
-                            if price.get("cash", {}).get("price", 0) == 0
-                            else price["cash"]["price"]
-                        ),
-                        "price": (
-                            None
-                            if price.get("credit", {}).get("price", 0) == 0
-                            else price["credit"]["price"]
-                        ),
-                        "last_updated": price["credit"]["postedTime"],
-                    }
-                else:
-                    price_data[index] = {
-                        "credit": price["credit"]["nickname"],
-                        "price": (
-                            None
-                            if price.get("credit", {}).get("price", 0) == 0
-                            else price["credit"]["price"]
-                        ),
-                        "last_updated": price["credit"]["postedTime"],
-                    }
-            result_list.append(price_data)
-        return result_list
+        started = time.perf_counter() if self._on_parse_done is not None else 0.0
+        results = response["data"]["locationBySearchTerm"]["stations"]["results"]
+        stations = [
+            parse_station(result, "Unknown Station")
+            for result in results[: max(limit, 0)]
+        ]
+        if self._on_parse_done is not None:
+            await self._on_parse_done(
+                operation="LocationBySearchTerm",
+                stage="results",
+                count=len(stations),
+                elapsed=time.perf_counter() - started,
+            )
+        return stations
+
+    async def ensure_token(self) -> str:
+        """Return a CSRF token, scraping a new one when the cache is stale."""
+        token = _CSRF_CACHE.get(self._csrf_ttl)
+        if token is None:
+            token = await _CSRF_CACHE.refresh(self._fetch_token)
+        self._tag = token or ""
+        return self._tag
 
-    @backoff.on_exception(
-        backoff.expo, aiohttp.ClientError, max_time=60, max_tries=5
-    )
     async def _get_headers(self) -> None:
         """Get required headers."""
+        await self.ensure_token()
+
+    @backoff.on_exception(
+        backoff.expo,
+        aiohttp.ClientError,
+        max_time=60,
+        max_tries=5,
+        on_backoff=_on_backoff,
+    )
+    async def _fetch_token(self) -> str | None:
+        """Scrape the CSRF token from the GasBuddy home page."""
+        started = time.perf_counter()
+        try:
+            return await self._scrape_token()
+        finally:
+            metrics.CSRF_SECONDS.observe(time.perf_counter() - started)
+
+    async def _scrape_token(self) -> str | None:
+        """Request the home page (or solver) and extract the token."""
+        if self._on_request_start is not None:
+            await self._on_request_start(operation="csrf", size=0)
+        started = time.perf_counter()
         headers = {
             "User-Agent": (
                 "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -264,35 +610,58 @@ class GasBuddy:
             "Origin": "https://www.gasbuddy.com",
             "Referer": "https://www.gasbuddy.com/home",
         }
-        url = "https://www.gasbuddy.com/home"
+        url = HOME_URL
         method = "get"
+        kwargs: dict[str, Any] = {"headers": headers, "timeout": _TIMEOUT}
 
         if self._solver:
+            json_data: dict[str, Any] = {}
             json_data["cmd"] = "request.get"
             json_data["url"] = url
             json_data["headers"] = headers
+            kwargs["json"] = json_data
             url = self._solver
             method = "post"
 
-        async with aiohttp.ClientSession(headers=headers) as session:
-            http_method = getattr(session, method)
-            try:
-                async with http_method(url) as response:
-                    message: str = ""
-                    message = await response.text()
-                    if response.status != 200:
-                        return
-
-                    if self._solver:
-                        message = json.loads(message)["solution"]["response"]
-
-                    pattern = re.compile(r'window\.gbcsrf\s*=\s*(["])(.*?)\1')
-                    found = pattern.search(message)
-                    if found is not None:
-                        self._tag = found.group(2)
-                    else:
-                        raise CSRFTokenMissing
-
-            except (TimeoutError, ServerTimeoutError):
-                pass
-            await session.close()
+        http_method = getattr(self.session, method)
+        try:
+            async with http_method(url, **kwargs) as response:
+                if response.status != 200:
+                    found = None
+                elif self._solver:
+                    message = codec.loads(await response.read())
+                    found = CSRF_PATTERN.search(
+                        message["solution"]["response"].encode()
+                    )
+                else:
+                    found = await self._scan_for_token(response.content)
+
+                if self._on_response is not None:
+                    await self._on_response(
+                        operation="csrf",
+                        status=response.status,
+                        size=response.content.total_bytes,
+                        elapsed=time.perf_counter() - started,
+                    )
+                if response.status != 200:
+                    return None
+
+                if found is None:
+                    raise CSRFTokenMissing
+                return found.group(2).decode()
+
+        except (TimeoutError, ServerTimeoutError):
+            return None
+
+    @staticmethod
+    async def _scan_for_token(content: aiohttp.StreamReader) -> re.Match | None:
+        """Read the page chunk by chunk and stop as soon as the token matches."""
+        buffer = b""
+        async for chunk in content.iter_chunked(CSRF_CHUNK_SIZE):
+            buffer += chunk
+            found = CSRF_PATTERN.search(buffer)
+            if found is not None:
+                return found
+            # Keep a tail so a token split across two chunks is still found.
+            buffer = buffer[-CSRF_SCAN_OVERLAP:]
+        return None
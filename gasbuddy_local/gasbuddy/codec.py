@@ -0,0 +1,53 @@
+"""JSON codec for the py-gasbuddy library.
+
+Uses orjson when it is installed and the standard library otherwise. Both
+backends decode straight from bytes and encode to bytes, and serialize any
+object with a ``to_dict`` method (such as ``Station``).
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Serialize records the encoder does not know natively."""
+    to_dict = getattr(obj, "to_dict", None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return to_dict()
+
+
+if orjson is not None:
+    BACKEND = "orjson"
+
+    def loads(data: bytes | str) -> Any:
+        """Decode JSON from bytes or str."""
+        return orjson.loads(data)
+
+    def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+        """Encode ``obj`` as compact UTF-8 JSON."""
+        return orjson.dumps(
+            obj, default=_default, option=orjson.OPT_SORT_KEYS if sort_keys else 0
+        )
+
+else:
+    BACKEND = "json"
+
+    def loads(data: bytes | str) -> Any:
+        """Decode JSON from bytes or str."""
+        return json.loads(data)
+
+    def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+        """Encode ``obj`` as compact UTF-8 JSON."""
+        return json.dumps(
+            obj,
+            default=_default,
+            sort_keys=sort_keys,
+            separators=(",", ":"),
+            ensure_ascii=False,
+        ).encode()
@@ -1,6 +1,44 @@
 """Constants for the py-gasbuddy GraphQL library."""
 
-BASE_URL = "https://www.gasbuddy.com/graphql"
+import os
+
+# Overridable so tests and load tests can point the client at a stand-in server.
+BASE_URL = os.getenv("GASBUDDY_BASE_URL", "https://www.gasbuddy.com/graphql")
+HOME_URL = os.getenv("GASBUDDY_HOME_URL", "https://www.gasbuddy.com/home")
+
+# Seconds a scraped CSRF token is reused before it is fetched again.
+CSRF_TOKEN_TTL = 600
+# The home page is streamed in chunks until the token shows up.
+CSRF_CHUNK_SIZE = 8192
+CSRF_SCAN_OVERLAP = 256
+
+# Connection pool tuning for the shared client session.
+CONNECTOR_LIMIT = 100
+CONNECTOR_LIMIT_PER_HOST = 20
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 30
+
+# Seconds an upstream request may take, to connect and between reads; a hung
+# upstream then counts as a timeout (overload) instead of holding a slot.
+REQUEST_TIMEOUT = 15
+REQUEST_CONNECT_TIMEOUT = 5
+REQUEST_READ_TIMEOUT = 10
+
+# Adaptive limit on GraphQL requests in flight (per event loop): +1 per round
+# trip while healthy, halved on 403/429/5xx/timeouts or slow answers.
+CONCURRENCY_INITIAL = 8
+CONCURRENCY_MIN = 1
+CONCURRENCY_MAX = CONNECTOR_LIMIT_PER_HOST
+CONCURRENCY_LATENCY_TARGET = 3.0
+# Requests queued for a slot beyond this, or for longer than this, fail fast.
+CONCURRENCY_MAX_WAITING = 100
+CONCURRENCY_MAX_WAIT = 10.0
+
+# Circuit breaker: open when half of the last calls failed, probe after a pause.
+BREAKER_WINDOW = 20
+BREAKER_MIN_CALLS = 10
+BREAKER_FAILURE_RATIO = 0.5
+BREAKER_RESET_TIMEOUT = 30
 
 DEFAULT_HEADERS = {
     "Content-Type": "application/json",
@@ -19,8 +57,16 @@ DEFAULT_HEADERS = {
     ),
 }
 
-GAS_PRICE_QUERY = "query GetStation($id: ID!) { station(id: $id) { brands { imageUrl } prices { cash { nickname postedTime price } credit { nickname postedTime price } fuelProduct longName } priceUnit currency id latitude longitude } }"
+STATION_FIELDS = "brands { imageUrl } prices { cash { nickname postedTime price } credit { nickname postedTime price } fuelProduct longName } priceUnit currency id latitude longitude"
+
+GAS_PRICE_QUERY = "query GetStation($id: ID!) { station(id: $id) { " + STATION_FIELDS + " } }"
+
+# Stations packed into one aliased GetStations document, and documents in flight at once.
+STATION_BATCH_SIZE = 25
+STATION_BATCH_CONCURRENCY = 4
 
 LOCATION_QUERY = "query LocationBySearchTerm($brandId: Int, $cursor: String, $fuel: Int, $lat: Float, $lng: Float, $maxAge: Int, $search: String) { locationBySearchTerm(lat: $lat, lng: $lng, search: $search) { stations(brandId: $brandId cursor: $cursor fuel: $fuel lat: $lat lng: $lng maxAge: $maxAge) { count results { address { line1 } id name } } } }"
 
 LOCATION_QUERY_PRICES = "query LocationBySearchTerm($brandId: Int, $cursor: String, $fuel: Int, $lat: Float, $lng: Float, $maxAge: Int, $search: String) { locationBySearchTerm(lat: $lat, lng: $lng, search: $search) { stations(brandId: $brandId cursor: $cursor fuel: $fuel lat: $lat lng: $lng maxAge: $maxAge) { results { address { line1 } prices { cash { nickname postedTime price } credit { nickname postedTime price } fuelProduct longName } priceUnit currency id latitude longitude } } trends { areaName country today todayLow trend } } }"
+
+LOCATION_QUERY_PRICES_PAGED = "query LocationBySearchTerm($brandId: Int, $cursor: String, $fuel: Int, $lat: Float, $lng: Float, $maxAge: Int, $search: String) { locationBySearchTerm(lat: $lat, lng: $lng, search: $search) { stations(brandId: $brandId cursor: $cursor fuel: $fuel lat: $lat lng: $lng maxAge: $maxAge) { cursor { next } results { address { line1 } prices { cash { nickname postedTime price } credit { nickname postedTime price } fuelProduct longName } priceUnit currency id latitude longitude } } } }"
@@ -0,0 +1,43 @@
+"""CSRF token cache for the py-gasbuddy library."""
+
+import time
+from typing import Awaitable, Callable
+
+from .singleflight import SingleFlight
+
+
+class CSRFTokenCache:
+    """Hold the GasBuddy CSRF token and refresh it one coroutine at a time."""
+
+    def __init__(self) -> None:
+        """Start with an empty cache."""
+        self._token: str | None = None
+        self._fetched_at = 0.0
+        self._refresh = SingleFlight()
+
+    def get(self, max_age: float) -> str | None:
+        """Return the cached token if it is younger than ``max_age`` seconds."""
+        if self._token and time.monotonic() - self._fetched_at < max_age:
+            return self._token
+        return None
+
+    def invalidate(self, token: str | None = None) -> None:
+        """Drop the cached token, unless it was already replaced."""
+        if token is None or token == self._token:
+            self._token = None
+
+    async def refresh(self, fetch: Callable[[], Awaitable[str | None]]) -> str | None:
+        """Fetch a new token, sharing any refresh already in flight."""
+        return await self._refresh.do("token", lambda: self._store(fetch))
+
+    async def _store(self, fetch: Callable[[], Awaitable[str | None]]) -> str | None:
+        """Run ``fetch`` and remember its token."""
+        token = await fetch()
+        if token:
+            self._token = token
+            self._fetched_at = time.monotonic()
+        return token
+
+    def stats(self) -> dict[str, int]:
+        """Return how often the token was scraped and how many waits were shared."""
+        return self._refresh.stats()
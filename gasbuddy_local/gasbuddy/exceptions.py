@@ -6,6 +6,12 @@ class GasBuddyError(Exception):
 class APIError(GasBuddyError):
     """Raised when the GasBuddy API returns an error."""
 
+class CircuitOpenError(GasBuddyError):
+    """Raised instead of calling GasBuddy while the upstream looks unhealthy."""
+
+class OverloadedError(GasBuddyError):
+    """Raised instead of queueing when too many requests wait for GasBuddy."""
+
 class CSRFTokenMissing(GasBuddyError):
     """Raised when the CSRF token cannot be retrieved."""
 
@@ -0,0 +1,23 @@
+"""Optional lifecycle hooks for profiling and tracing GasBuddy calls.
+
+Every hook is an async callable receiving keyword arguments:
+
+``on_request_start(operation, size)``
+    A GraphQL document of ``size`` bytes (or the CSRF scrape, operation
+    ``"csrf"``) is about to be sent.
+``on_response(operation, status, size, elapsed)``
+    One HTTP exchange finished; ``status`` is None on timeouts.
+``on_retry(operation, tries, wait, error)``
+    backoff scheduled another attempt after ``error``.
+``on_parse_done(operation, stage, count, elapsed)``
+    A parse step finished: ``"decode"`` (``count`` bytes), ``"results"``
+    (``count`` stations) or ``"trends"``.
+
+``on_request_start`` fires for every request, but the response, retry and
+decode hooks of a request shared through single-flight only fire on the
+client that made the upstream call. Unset hooks cost one ``is None`` check.
+"""
+
+from collections.abc import Awaitable, Callable
+
+Hook = Callable[..., Awaitable[None]]
@@ -0,0 +1,190 @@
+"""Adaptive concurrency limit and circuit breaker for the py-gasbuddy library."""
+
+import asyncio
+import collections
+import time
+
+from .exceptions import CircuitOpenError, OverloadedError
+
+# Upstream answers that mean "back off": rejected, throttled or failing.
+OVERLOAD_STATUSES = frozenset({403, 429})
+
+
+def is_overload(status: int | None) -> bool:
+    """Return True for timeouts, 403/429 and 5xx answers."""
+    return status is None or status in OVERLOAD_STATUSES or status >= 500
+
+
+class AdaptiveLimiter:
+    """Cap requests in flight, growing the cap additively and halving it on overload.
+
+    Callers wait in arrival order; past ``max_waiting`` queued callers, or
+    after ``max_wait`` seconds in the queue, they fail fast with
+    OverloadedError. Futures are bound to one event loop, so keep one limiter
+    per loop.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        latency_target: float,
+        decrease_ratio: float = 0.5,
+        max_waiting: int | None = None,
+        max_wait: float | None = None,
+    ) -> None:
+        """Start with ``initial`` slots; None means an unbounded queue or wait."""
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.decrease_ratio = decrease_ratio
+        self.max_waiting = max_waiting
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.decreases = 0
+        self.shed = 0
+        self._last_decrease = 0.0
+        self._waiters: collections.deque[asyncio.Future] = collections.deque()
+
+    async def acquire(self) -> float:
+        """Wait for a slot and return the time it was granted.
+
+        Raises:
+            OverloadedError: If the queue is full or the wait took too long
+        """
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return time.monotonic()
+        if self.max_waiting is not None and len(self._waiters) >= self.max_waiting:
+            self.shed += 1
+            raise OverloadedError
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            async with asyncio.timeout(self.max_wait):
+                await waiter
+        except (asyncio.CancelledError, TimeoutError) as err:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we gave up; pass it on.
+                self.in_flight -= 1
+                self._wake()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(err, TimeoutError):
+                self.shed += 1
+                raise OverloadedError from None
+            raise
+        return time.monotonic()
+
+    def release(self, started: float, overloaded: bool | None) -> None:
+        """Return a slot and adapt the limit to how the request went.
+
+        ``overloaded`` is None when the request was abandoned (cancelled), in
+        which case it says nothing about the upstream and the limit is kept.
+        """
+        now = time.monotonic()
+        if overloaded is not None:
+            if overloaded or now - started > self.latency_target:
+                # One decrease per round trip: requests that started before
+                # the last cut already reflect it.
+                if started >= self._last_decrease:
+                    self.limit = max(self.minimum, self.limit * self.decrease_ratio)
+                    self._last_decrease = now
+                    self.decreases += 1
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        """Hand free slots to waiters in arrival order."""
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def stats(self) -> dict[str, float]:
+        """Return the current limit and queue."""
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "decreases": self.decreases,
+            "shed": self.shed,
+        }
+
+
+class CircuitBreaker:
+    """Fail fast once most recent upstream calls failed, then probe for recovery."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        window: int,
+        min_calls: int,
+        failure_ratio: float,
+        reset_timeout: float,
+    ) -> None:
+        """Start closed."""
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.opened = 0
+        self.rejected = 0
+        self._outcomes: collections.deque[bool] = collections.deque(maxlen=window)
+        self._open_until = 0.0
+        self._probing = False
+        self._probe_started = 0.0
+
+    def check(self) -> None:
+        """Raise CircuitOpenError unless a call may go upstream now."""
+        if self.state == self.CLOSED:
+            return
+        now = time.monotonic()
+        if self.state == self.OPEN and now >= self._open_until:
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.HALF_OPEN and (
+            # A probe that never reported back (cancelled) is replaced.
+            not self._probing or now - self._probe_started > self.reset_timeout
+        ):
+            self._probing = True
+            self._probe_started = now
+            return
+        self.rejected += 1
+        raise CircuitOpenError
+
+    def record(self, failed: bool) -> None:
+        """Record the outcome of a call that went upstream."""
+        if self.state == self.HALF_OPEN:
+            if failed:
+                self._trip()
+            else:
+                self.state = self.CLOSED
+                self._outcomes.clear()
+            self._probing = False
+            return
+        self._outcomes.append(failed)
+        if (
+            len(self._outcomes) >= self.min_calls
+            and sum(self._outcomes) >= self.failure_ratio * len(self._outcomes)
+        ):
+            self._trip()
+
+    def _trip(self) -> None:
+        """Open the circuit for ``reset_timeout`` seconds."""
+        self.state = self.OPEN
+        self._open_until = time.monotonic() + self.reset_timeout
+        self._outcomes.clear()
+        self.opened += 1
+
+    def stats(self) -> dict[str, int | str]:
+        """Return the state and how often the circuit opened or rejected calls."""
+        return {"state": self.state, "opened": self.opened, "rejected": self.rejected}
@@ -0,0 +1,231 @@
+"""Station and price records for the py-gasbuddy library."""
+
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+_BASE_KEYS = ("station_id", "unit_of_measure", "currency", "latitude", "longitude")
+_CASH_KEYS = ("credit", "cash_price", "price", "last_updated")
+_CREDIT_KEYS = ("credit", "price", "last_updated")
+# Station keys by (has name, has image_url), shared by every record.
+_STATION_KEYS = {
+    (False, False): _BASE_KEYS,
+    (True, False): _BASE_KEYS + ("name",),
+    (False, True): _BASE_KEYS + ("image_url",),
+    (True, True): _BASE_KEYS + ("name", "image_url"),
+}
+_new = object.__new__
+
+
+class FuelPrice(Mapping):
+    """Price of one fuel product at a station.
+
+    Reads like the dict the library used to return: ``cash_price`` is only a
+    key when the station reported a cash price block.
+    """
+
+    __slots__ = ("credit", "price", "cash_price", "last_updated", "_keys")
+
+    def __init__(
+        self,
+        credit: str | None,
+        price: float | None,
+        last_updated: str | None,
+        cash_price: float | None = None,
+        has_cash: bool = False,
+    ) -> None:
+        """Store one fuel price."""
+        self.credit = credit
+        self.price = price
+        self.cash_price = cash_price
+        self.last_updated = last_updated
+        self._keys = _CASH_KEYS if has_cash else _CREDIT_KEYS
+
+    @classmethod
+    def from_raw(cls, price: dict[str, Any]) -> "FuelPrice":
+        """Build from one entry of a GraphQL ``prices`` list."""
+        credit = price["credit"]
+        cash = price["cash"]
+        # Slots are filled directly: this runs for every product of every station.
+        self = _new(cls)
+        self.credit = credit["nickname"]
+        self.price = credit.get("price") or None
+        self.last_updated = credit["postedTime"]
+        if cash:
+            self.cash_price = cash.get("price") or None
+            self._keys = _CASH_KEYS
+        else:
+            self.cash_price = None
+            self._keys = _CREDIT_KEYS
+        return self
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._keys:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    # Mapping's versions go through __getitem__ and a caught KeyError.
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a field, or ``default`` when it is not a key."""
+        return getattr(self, key) if key in self._keys else default
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return f"FuelPrice({self.to_dict()!r})"
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the JSON-ready dict."""
+        if self._keys is _CASH_KEYS:
+            return {
+                "credit": self.credit,
+                "cash_price": self.cash_price,
+                "price": self.price,
+                "last_updated": self.last_updated,
+            }
+        return {"credit": self.credit, "price": self.price, "last_updated": self.last_updated}
+
+
+class Station(Mapping):
+    """A station and its fuel prices.
+
+    Fields are stored in slots and only turned into nested dicts by
+    ``to_dict``; until then the record reads like that dict, with fuel
+    products (``regular_gas``, ``diesel``, ...) as extra keys.
+    """
+
+    __slots__ = (
+        "station_id",
+        "unit_of_measure",
+        "currency",
+        "latitude",
+        "longitude",
+        "name",
+        "image_url",
+        "prices",
+        "_keys",
+    )
+
+    def __init__(
+        self,
+        station_id: str,
+        unit_of_measure: str | None,
+        currency: str | None,
+        latitude: float | None,
+        longitude: float | None,
+        prices: dict[str, FuelPrice],
+        name: str | None = None,
+        image_url: str | None = None,
+        keys: tuple[str, ...] = _BASE_KEYS,
+    ) -> None:
+        """Store one station."""
+        self.station_id = station_id
+        self.unit_of_measure = unit_of_measure
+        self.currency = currency
+        self.latitude = latitude
+        self.longitude = longitude
+        self.name = name
+        self.image_url = image_url
+        self.prices = prices
+        self._keys = keys
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._keys:
+            return getattr(self, key)
+        return self.prices[key]
+
+    # Mapping's versions go through __getitem__ and a caught KeyError, which
+    # is slow for the absent fuel products every caller probes for.
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a field or fuel product, or ``default`` when it is not a key."""
+        price = self.prices.get(key)
+        if price is not None:
+            return price
+        return getattr(self, key) if key in self._keys else default
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.prices or key in self._keys
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._keys
+        yield from self.prices
+
+    def __len__(self) -> int:
+        return len(self._keys) + len(self.prices)
+
+    def __repr__(self) -> str:
+        return f"Station({self.station_id!r}, {list(self.prices)!r})"
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the JSON-ready dict."""
+        data = {
+            "station_id": self.station_id,
+            "unit_of_measure": self.unit_of_measure,
+            "currency": self.currency,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+        }
+        if self._keys is not _BASE_KEYS:
+            if "name" in self._keys:
+                data["name"] = self.name
+            if "image_url" in self._keys:
+                data["image_url"] = self.image_url
+        for product, price in self.prices.items():
+            data[product] = price.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Station":
+        """Rebuild a record from its ``to_dict`` form."""
+        prices = {
+            product: FuelPrice(
+                value["credit"],
+                value["price"],
+                value["last_updated"],
+                value.get("cash_price"),
+                has_cash="cash_price" in value,
+            )
+            for product, value in data.items()
+            if isinstance(value, dict)
+        }
+        return cls(
+            data["station_id"],
+            data["unit_of_measure"],
+            data["currency"],
+            data["latitude"],
+            data["longitude"],
+            prices,
+            name=data.get("name"),
+            image_url=data.get("image_url"),
+            keys=_STATION_KEYS["name" in data, "image_url" in data],
+        )
+
+
+def parse_station(raw: dict[str, Any], default_name: str | None = None) -> Station:
+    """Build a Station from a GraphQL station object.
+
+    ``name`` is a key when the object carries one or ``default_name`` is
+    given; ``image_url`` is a key when the object carries ``brands``.
+    """
+    name = raw.get("name", default_name)
+    brands = raw.get("brands")
+    from_raw = FuelPrice.from_raw
+
+    # Slots are filled directly, like FuelPrice.from_raw, to skip __init__.
+    station = _new(Station)
+    station.station_id = raw["id"]
+    station.unit_of_measure = raw["priceUnit"]
+    station.currency = raw["currency"]
+    station.latitude = raw["latitude"]
+    station.longitude = raw["longitude"]
+    station.name = name
+    station.image_url = brands[0]["imageUrl"] if brands else None
+    station.prices = {price["fuelProduct"]: from_raw(price) for price in raw["prices"]}
+    station._keys = _STATION_KEYS[name is not None, "brands" in raw]
+    return station
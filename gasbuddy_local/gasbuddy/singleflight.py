@@ -0,0 +1,44 @@
+"""Single-flight request coalescing for the py-gasbuddy library."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """Let concurrent callers with the same key share one in-flight call."""
+
+    def __init__(self) -> None:
+        """Start with nothing in flight."""
+        self._calls: dict[tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Await ``factory()``, or the call already running under ``key``."""
+        loop = asyncio.get_running_loop()
+        slot = (loop, key)
+        task = self._calls.get(slot)
+        if task is None:
+            task = loop.create_task(factory())
+            self._calls[slot] = task
+            task.add_done_callback(lambda done: self._forget(slot, done))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        # A cancelled caller must not cancel the call the others are waiting on.
+        return await asyncio.shield(task)
+
+    def _forget(self, slot: tuple, task: asyncio.Task) -> None:
+        """Drop a finished call so the next caller starts a fresh one."""
+        if self._calls.get(slot) is task:
+            del self._calls[slot]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when every waiter went away
+
+    def stats(self) -> dict[str, int]:
+        """Return how many calls ran and how many callers piggybacked on them."""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
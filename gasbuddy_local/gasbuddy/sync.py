@@ -0,0 +1,125 @@
+"""Synchronous facade for the py-gasbuddy library."""
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+from typing import Any, Collection, Coroutine
+
+from . import GasBuddy
+from .models import Station
+
+_DEFAULT = object()
+
+
+class SyncGasBuddy:
+    """Blocking, thread-safe GasBuddy client for WSGI code.
+
+    Every call is submitted to one long-lived event loop running in a daemon
+    thread, so threads share a single client, connection pool and CSRF token
+    instead of each spinning up a loop and session per request. The loop is
+    started lazily, and restarted in a forked child.
+    """
+
+    def __init__(self, timeout: float | None = 60, **client_kwargs: Any) -> None:
+        """Prepare the facade; ``client_kwargs`` are passed to GasBuddy."""
+        self._timeout = timeout
+        self._client_kwargs = client_kwargs
+        self._lock = threading.Lock()
+        self._pid: int | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._client: GasBuddy | None = None
+
+    def __enter__(self) -> "SyncGasBuddy":
+        """Enter the facade context."""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Stop the loop thread on exit."""
+        self.close()
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        """Return the background loop, starting it on first use."""
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=self._run_loop, args=(loop,), name="gasbuddy-loop", daemon=True
+                )
+                thread.start()
+                self._pid = os.getpid()
+                self._loop = loop
+                self._thread = thread
+                self._client = GasBuddy(**self._client_kwargs)
+            return self._loop
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    @property
+    def client(self) -> GasBuddy:
+        """Return the GasBuddy client living on the background loop."""
+        self._start()
+        return self._client
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Return the background loop."""
+        return self._start()
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: Any = _DEFAULT) -> Any:
+        """Run ``coro`` on the background loop and block until it finishes."""
+        loop = self._start()
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("SyncGasBuddy.run() called from its own event loop")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(self._timeout if timeout is _DEFAULT else timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def location_search(
+        self,
+        lat: float | None = None,
+        lon: float | None = None,
+        zipcode: int | None = None,
+    ) -> dict[str, Any]:
+        """Return result of location search."""
+        return self.run(self.client.location_search(lat, lon, zipcode))
+
+    def price_lookup(self) -> Station | None:
+        """Return gas price of the client's station_id."""
+        return self.run(self.client.price_lookup())
+
+    def price_lookup_many(
+        self, station_ids: Collection[int | str], **kwargs: Any
+    ) -> dict[str, Station | None]:
+        """Return gas prices of many stations, keyed by station id."""
+        return self.run(self.client.price_lookup_many(station_ids, **kwargs))
+
+    def price_lookup_service(
+        self,
+        lat: float | None = None,
+        lon: float | None = None,
+        zipcode: int | None = None,
+        limit: int = 5,
+    ) -> dict[str, Any] | None:
+        """Return gas prices of stations near a location."""
+        return self.run(self.client.price_lookup_service(lat, lon, zipcode, limit))
+
+    def close(self) -> None:
+        """Close the client and stop the loop thread."""
+        with self._lock:
+            loop, thread, client = self._loop, self._thread, self._client
+            self._loop = self._thread = self._client = None
+        if loop is None or self._pid != os.getpid():
+            return
+        asyncio.run_coroutine_threadsafe(client.close(), loop).result(self._timeout)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(self._timeout)
+        loop.close()
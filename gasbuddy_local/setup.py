@@ -9,4 +9,7 @@ setup(
         "backoff>=2.2.0",
         "attrs>=25.0.0",
     ],
+    extras_require={
+        "fast": ["orjson>=3.9.0"],
+    },
 )
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Offline Gazetteer for the Gas Price API
+=======================================
+
+Compiles GeoNames postal code and city dumps into one sorted, fixed-width
+index file that is memory-mapped at startup and binary-searched per lookup,
+so common postal codes and city names resolve without calling Nominatim.
+
+Build an index (plain .txt or the .zip files from download.geonames.org):
+
+    python gazetteer.py --postal allCountries.zip --cities cities500.zip -o gazetteer.idx
+"""
+
+import argparse
+import bisect
+import csv
+import io
+import mmap
+import os
+import re
+import struct
+import zipfile
+
+from config import Config
+from geocache import normalize_location
+
+MAGIC = b"GBGAZ001"
+HEADER = struct.Struct("<8sII")
+# key, country, admin1 code, latitude, longitude, rank (population)
+RECORD = struct.Struct("<40s2s6sffI")
+KEY_SIZE = 40
+
+_CA_POSTAL = re.compile(r"^[a-z]\d[a-z]\d[a-z]\d$")
+_GB_POSTAL = re.compile(r"^[a-z]{1,2}\d[a-z\d]?\d[a-z]{2}$")
+
+
+def _index_key(location: str) -> str:
+    """Return the country-less part of the geocode cache key."""
+    return normalize_location(location).split("|", 1)[1]
+
+
+class Gazetteer:
+    """Read-only, memory-mapped view of a compiled gazetteer index."""
+
+    def __init__(self, path: str):
+        """Map ``path`` into memory."""
+        self.path = path
+        with open(path, "rb") as handle:
+            self._buf = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count, record_size = HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or record_size != RECORD.size:
+            self._buf.close()
+            raise ValueError(f"{path} is not a gazetteer index")
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> bytes:
+        """Return the raw key of record ``index`` (lets bisect search the map)."""
+        offset = HEADER.size + index * RECORD.size
+        return self._buf[offset:offset + KEY_SIZE]
+
+    def close(self) -> None:
+        self._buf.close()
+
+    def _records(self, key: str) -> list[tuple[str, str, float, float, int]]:
+        """Return (country, admin1, lat, lon, rank) for every record under ``key``."""
+        raw = key.encode("utf-8")
+        if len(raw) > KEY_SIZE:
+            return []
+        raw = raw.ljust(KEY_SIZE, b"\0")
+        found = []
+        index = bisect.bisect_left(self, raw)
+        while index < self._count and self[index] == raw:
+            _, country, admin1, lat, lon, rank = RECORD.unpack_from(
+                self._buf, HEADER.size + index * RECORD.size)
+            found.append((country.decode(), admin1.rstrip(b"\0").decode(), lat, lon, rank))
+            index += 1
+        return found
+
+    def lookup(self, location: str, country_code: str = None) -> tuple[float, float] | None:
+        """
+        Resolve a postal code or city name.
+
+        Args:
+            location: Location string as sent by the client
+            country_code: Optional 2-letter country code filter
+
+        Returns:
+            Tuple of (latitude, longitude) or None when the index has no answer
+        """
+        country = (country_code or "").strip().upper()
+        key = _index_key(location)
+
+        candidates = self._records(key)
+        if not candidates and ", " in key:
+            # "Toronto, CA" / "Springfield, IL": accept the qualifier only when
+            # it names the record's country or first-level division.
+            name, qualifier = key.split(", ", 1)
+            qualifier = qualifier.upper()
+            candidates = [record for record in self._records(name)
+                          if qualifier in (record[0], record[1].upper())]
+        if not candidates and (country in ("", "CA") and _CA_POSTAL.match(key)):
+            candidates = self._records(key[:3])  # GeoNames only ships the FSA
+        if not candidates and (country in ("", "GB") and _GB_POSTAL.match(key)):
+            candidates = self._records(key[:-3])  # ... and the outward code
+
+        if country:
+            candidates = [record for record in candidates if record[0] == country]
+        if not country and len({record[0] for record in candidates if not record[4]}) > 1:
+            # The same postal code exists in several countries; let Nominatim decide
+            candidates = [record for record in candidates if record[4]]
+
+        if not candidates:
+            self.misses += 1
+            return None
+        self.hits += 1
+        best = max(candidates, key=lambda record: record[4])
+        return round(best[2], 5), round(best[3], 5)  # stored as float32
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for this process."""
+        return {"hits": self.hits, "misses": self.misses, "entries": self._count}
+
+
+def load_gazetteer(path: str) -> Gazetteer | None:
+    """Open the index at ``path``, or return None when it is not available."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return Gazetteer(path)
+    except (OSError, ValueError) as e:
+        print(f"Gazetteer disabled: {e}")
+        return None
+
+
+def _open_dump(path: str):
+    """Open a GeoNames dump, reading the first .txt member of a .zip."""
+    if path.endswith(".zip"):
+        archive = zipfile.ZipFile(path)
+        name = next(n for n in archive.namelist() if n.endswith(".txt") and n != "readme.txt")
+        return io.TextIOWrapper(archive.open(name), encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def _rows(path: str):
+    with _open_dump(path) as handle:
+        yield from csv.reader(handle, delimiter="\t", quoting=csv.QUOTE_NONE)
+
+
+def build_index(output: str, postal_dumps=(), city_dumps=(), countries=None) -> int:
+    """
+    Compile GeoNames dumps into an index file.
+
+    Args:
+        output: Path of the index to write
+        postal_dumps: GeoNames postal code files (allCountries.txt, CA.txt, ...)
+        city_dumps: GeoNames city files (cities500.txt, cities15000.txt, ...)
+        countries: Country codes to keep; everything when None
+
+    Returns:
+        Number of records written
+    """
+    wanted = {c.upper() for c in countries} if countries else None
+    records = {}
+
+    def add(name, country, admin1, lat, lon, rank):
+        key = _index_key(name).encode("utf-8")
+        if not key or len(key) > KEY_SIZE:
+            return
+        slot = (key, country, admin1)
+        if slot not in records or records[slot][2] < rank:
+            records[slot] = (float(lat), float(lon), rank)
+
+    for path in postal_dumps:
+        for row in _rows(path):
+            if len(row) < 11 or (wanted and row[0] not in wanted) or not row[9]:
+                continue
+            add(row[1], row[0], row[4], row[9], row[10], 0)
+
+    for path in city_dumps:
+        for row in _rows(path):
+            if len(row) < 15 or (wanted and row[8] not in wanted):
+                continue
+            population = int(row[14] or 0)
+            for name in {row[1], row[2]}:
+                add(name, row[8], row[10], row[4], row[5], population)
+
+    ordered = sorted(records.items(), key=lambda item: (item[0][0], item[0][1], -item[1][2]))
+    with open(output + ".tmp", "wb") as handle:
+        handle.write(HEADER.pack(MAGIC, len(ordered), RECORD.size))
+        for (key, country, admin1), (lat, lon, rank) in ordered:
+            handle.write(RECORD.pack(key, country.encode()[:2], admin1.encode()[:6],
+                                     lat, lon, min(rank, 0xFFFFFFFF)))
+    os.replace(output + ".tmp", output)
+    return len(ordered)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile a GeoNames gazetteer index")
+    parser.add_argument("--postal", action="append", default=[], help="GeoNames postal code dump")
+    parser.add_argument("--cities", action="append", default=[], help="GeoNames cities dump")
+    parser.add_argument("--countries", default=",".join(Config.SUPPORTED_COUNTRIES),
+                        help="Comma separated country codes to keep ('' for all)")
+    parser.add_argument("-o", "--output", default=Config.GAZETTEER_PATH)
+    args = parser.parse_args()
+
+    count = build_index(
+        args.output,
+        postal_dumps=args.postal,
+        city_dumps=args.cities,
+        countries=[c for c in args.countries.split(",") if c] or None,
+    )
+    print(f"Wrote {count} records to {args.output}")
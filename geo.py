@@ -0,0 +1,102 @@
+"""
+Geographic Helpers for the Gas Price API
+========================================
+
+Great-circle distances and geohash tiles. Distances from one point to many
+are computed in a single NumPy pass when NumPy is installed.
+"""
+
+import math
+
+try:
+    import numpy
+except ImportError:  # pure-Python fallback
+    numpy = None
+
+EARTH_RADIUS_KM = 6371.0088
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_BASE32_INDEX = {char: index for index, char in enumerate(_BASE32)}
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Return the great-circle distance between two points in kilometres."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def haversine_many(lat: float, lon: float, lats, lons) -> list[float]:
+    """Return the distances in kilometres from (lat, lon) to every (lats[i], lons[i])."""
+    if numpy is None or len(lats) < 8:
+        return [haversine_km(lat, lon, lat2, lon2) for lat2, lon2 in zip(lats, lons)]
+    phi1 = math.radians(lat)
+    phi2 = numpy.radians(numpy.asarray(lats, dtype=float))
+    dlambda = numpy.radians(numpy.asarray(lons, dtype=float) - lon)
+    a = numpy.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * numpy.cos(phi2) * numpy.sin(dlambda / 2) ** 2
+    return (2 * EARTH_RADIUS_KM * numpy.arcsin(numpy.sqrt(numpy.minimum(a, 1.0)))).tolist()
+
+
+def geohash_encode(lat: float, lon: float, precision: int = 6) -> str:
+    """Return the geohash of a point (precision 6 is roughly 1.2 km x 0.6 km)."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if lon >= mid:
+                value = (value << 1) | 1
+                lon_range[0] = mid
+            else:
+                value <<= 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if lat >= mid:
+                value = (value << 1) | 1
+                lat_range[0] = mid
+            else:
+                value <<= 1
+                lat_range[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def geohash_bounds(geohash: str) -> tuple[float, float, float, float]:
+    """Return (lat_min, lat_max, lon_min, lon_max) of a geohash cell."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _BASE32_INDEX[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            target = lon_range if even else lat_range
+            mid = (target[0] + target[1]) / 2
+            target[1 - bit] = mid
+            even = not even
+    return lat_range[0], lat_range[1], lon_range[0], lon_range[1]
+
+
+def geohash_cell_size(precision: int) -> tuple[float, float]:
+    """Return the (lat, lon) size in degrees of a geohash cell of ``precision`` characters."""
+    bits = 5 * precision
+    return 180 / 2 ** (bits // 2), 360 / 2 ** ((bits + 1) // 2)
+
+
+def geohash_center(geohash: str) -> tuple[float, float]:
+    """Return the centre (lat, lon) of a geohash cell."""
+    lat_min, lat_max, lon_min, lon_max = geohash_bounds(geohash)
+    return (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
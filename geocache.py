@@ -0,0 +1,152 @@
+"""
+Geocode Cache for the Gas Price API
+===================================
+
+Two tiers: a per-process LRU in front of a SQLite file that every gunicorn
+worker on the node shares. Misses from Nominatim are cached too (with a
+shorter TTL) so unknown places are not looked up again on every request.
+
+The memory tier is cheap enough to check anywhere; the ``*_disk`` methods
+block on SQLite, so async callers run them in a thread.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from shared_sqlite import SharedSQLite
+
+# Returned by GeocodeCache.get when nothing (not even a miss) is cached.
+MISSING = object()
+
+_POSTAL_CODE = re.compile(r"^[0-9a-z][0-9a-z \-]{1,9}$")
+
+
+def normalize_location(location: str, country_code: str = None) -> str:
+    """
+    Build the cache key for a location query.
+
+    Case and whitespace are folded, and postal codes lose their inner spaces
+    and dashes, so ``L6Y 4V3`` and ``l6y4v3`` share one entry.
+    """
+    text = " ".join(location.casefold().split())
+    text = re.sub(r"\s*,\s*", ", ", text)
+    if _POSTAL_CODE.match(text) and any(char.isdigit() for char in text):
+        text = text.replace(" ", "").replace("-", "")
+    country = (country_code or "").strip().upper()
+    return f"{country}|{text}"
+
+
+class GeocodeCache:
+    """In-memory LRU backed by an on-disk SQLite store."""
+
+    def __init__(self, path: str = None, ttl: float = 30 * 24 * 3600,
+                 negative_ttl: float = 3600, max_entries: int = 10000):
+        """
+        Create a cache.
+
+        Args:
+            path: SQLite file shared between workers; memory only when empty
+            ttl: Seconds a resolved location stays valid
+            negative_ttl: Seconds a "not found" answer stays valid
+            max_entries: Size of the in-memory LRU
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = SharedSQLite(path, "Geocode cache", (
+            "CREATE TABLE IF NOT EXISTS geocode (key TEXT PRIMARY KEY, lat REAL, lon REAL, expires REAL)",
+        ))
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db.connect()
+
+    def get(self, key: str):
+        """
+        Look up a normalized key.
+
+        Returns:
+            (lat, lon), None for a cached miss, or MISSING
+        """
+        coordinates = self.get_memory(key)
+        return self.get_disk(key) if coordinates is MISSING else coordinates
+
+    def get_memory(self, key: str):
+        """Look up a normalized key in the LRU only (a MISSING answer is not counted as a miss)."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1]
+                del self._memory[key]
+        return MISSING
+
+    def get_disk(self, key: str):
+        """Look up a normalized key in the SQLite file, after the LRU missed."""
+        now = time.time()
+        conn = self._db.connect()
+        if conn is not None:
+            try:
+                row = conn.execute(
+                    "SELECT lat, lon, expires FROM geocode WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error:
+                row = None
+            if row is not None and row[2] > now:
+                coordinates = None if row[0] is None else (row[0], row[1])
+                self._remember(key, coordinates, row[2])
+                self.disk_hits += 1
+                return coordinates
+
+        self.misses += 1
+        return MISSING
+
+    def set(self, key: str, coordinates: tuple[float, float] | None) -> None:
+        """Store a result; ``None`` records that the location was not found."""
+        self.set_disk(key, coordinates, self.set_memory(key, coordinates))
+
+    def set_memory(self, key: str, coordinates: tuple[float, float] | None) -> float:
+        """Store a result in the LRU only; return when it expires."""
+        expires = time.time() + (self.ttl if coordinates else self.negative_ttl)
+        self._remember(key, coordinates, expires)
+        return expires
+
+    def set_disk(self, key: str, coordinates: tuple[float, float] | None, expires: float) -> None:
+        """Store a result (expiring at ``expires``) in the SQLite file."""
+        conn = self._db.connect()
+        if conn is not None:
+            lat, lon = coordinates if coordinates else (None, None)
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO geocode (key, lat, lon, expires) VALUES (?, ?, ?, ?)",
+                    (key, lat, lon, expires),
+                )
+            except sqlite3.Error:
+                pass
+
+    def _remember(self, key: str, coordinates, expires: float) -> None:
+        """Put an entry in the LRU, evicting the oldest when full."""
+        with self._lock:
+            self._memory[key] = (expires, coordinates)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for this process."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round((lookups - self.misses) / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
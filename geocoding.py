@@ -0,0 +1,157 @@
+"""
+Async Geocoding for the Gas Price API
+=====================================
+
+Resolves postal codes, city names and addresses to coordinates through
+OpenStreetMap Nominatim without blocking the event loop.
+"""
+
+import asyncio
+import os
+import time
+
+import aiohttp
+
+from gasbuddy_local.gasbuddy import codec
+from gasbuddy_local.gasbuddy.metrics import REGISTRY
+from gazetteer import Gazetteer
+from geocache import MISSING, GeocodeCache, normalize_location
+
+NOMINATIM_URL = os.getenv('NOMINATIM_URL', "https://nominatim.openstreetmap.org/search")
+USER_AGENT = "GasBuddy-International-API/1.0"
+GEOCODE_TIMEOUT = 10
+
+GEOCODE_SECONDS = REGISTRY.histogram(
+    "geocode_request_seconds", "Nominatim request latency by outcome.", ("outcome",)
+)
+
+
+class Geocoder:
+    """Geocode locations over a shared aiohttp session."""
+
+    def __init__(self, session: aiohttp.ClientSession = None, url: str = NOMINATIM_URL,
+                 cache: GeocodeCache = None, gazetteer: Gazetteer = None):
+        """
+        Create a geocoder.
+
+        Args:
+            session: Session to reuse, e.g. ``GasBuddy.session``. One is
+                created (and owned) by the geocoder when omitted.
+            url: Nominatim search endpoint
+            cache: Optional cache consulted before Nominatim
+            gazetteer: Optional offline index consulted before anything else
+        """
+        self._session = session
+        self._cache = cache
+        self._gazetteer = gazetteer
+        self._owns_session = session is None
+        self._url = url
+        self._timeout = aiohttp.ClientTimeout(total=GEOCODE_TIMEOUT)
+
+    async def __aenter__(self) -> "Geocoder":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Return the session, creating one on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+            self._owns_session = True
+        return self._session
+
+    async def close(self) -> None:
+        """Close the session if this geocoder created it."""
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+        self._session = None
+
+    async def geocode(self, location: str, country_code: str = None) -> tuple[float, float] | None:
+        """
+        Convert location string to coordinates.
+        Supports postal codes, city names, addresses for any country.
+
+        Args:
+            location: Location string (postal code, city, address)
+            country_code: Optional 2-letter country code (e.g., 'CA', 'US', 'GB')
+
+        Returns:
+            Tuple of (latitude, longitude) or None if not found
+        """
+        # Clean up the location string
+        location = location.strip()
+
+        if self._gazetteer is not None:
+            coordinates = self._gazetteer.lookup(location, country_code)
+            if coordinates:
+                return coordinates
+
+        if self._cache is None:
+            return (await self._search(location, country_code))[0]
+
+        key = normalize_location(location, country_code)
+        cached = self._cache.get_memory(key)
+        if cached is MISSING:
+            # The disk tier waits on SQLite (and other workers' writes): keep it off the loop
+            cached = await asyncio.to_thread(self._cache.get_disk, key)
+        if cached is not MISSING:
+            return cached
+
+        coordinates, answered = await self._search(location, country_code)
+        if answered:
+            expires = self._cache.set_memory(key, coordinates)
+            await asyncio.to_thread(self._cache.set_disk, key, coordinates, expires)
+        return coordinates
+
+    async def _search(self, location: str, country_code: str = None):
+        """
+        Query Nominatim.
+
+        Returns:
+            ((lat, lon) or None, whether Nominatim actually answered)
+        """
+        params = {
+            "q": location,
+            "format": "json",
+            "limit": 1,
+            "addressdetails": 1
+        }
+
+        # Add country code if specified
+        if country_code:
+            params["countrycodes"] = country_code.upper()
+
+        headers = {"User-Agent": USER_AGENT}
+
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            async with self.session.get(self._url, params=params, headers=headers,
+                                        timeout=self._timeout) as response:
+                response.raise_for_status()
+                data = codec.loads(await response.read())
+
+            if data:
+                outcome = "found"
+                return (float(data[0]['lat']), float(data[0]['lon'])), True
+            outcome = "not_found"
+            return None, True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Geocoding error: {e}")
+        except (ValueError, KeyError) as e:
+            print(f"Data parsing error: {e}")
+        finally:
+            GEOCODE_SECONDS.labels(outcome).observe(time.perf_counter() - started)
+
+        return None, False
+
+
+async def geocode_location(location: str, country_code: str = None,
+                           session: aiohttp.ClientSession = None,
+                           cache: GeocodeCache = None,
+                           gazetteer: Gazetteer = None) -> tuple[float, float] | None:
+    """Geocode one location, reusing ``session``, ``cache`` and ``gazetteer`` when given."""
+    async with Geocoder(session=session, cache=cache, gazetteer=gazetteer) as geocoder:
+        return await geocoder.geocode(location, country_code)
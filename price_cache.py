@@ -0,0 +1,317 @@
+"""
+Tiled Price Cache for the Gas Price API
+=======================================
+
+Caches ``price_lookup_service`` answers per geohash tile. Every request that
+lands in a tile is served from one upstream query made at the tile centre;
+the cached stations are then re-ranked for the caller's exact point. When the
+upstream fails (or its circuit breaker is open), an expired answer up to
+``stale_ttl`` seconds old is served instead, marked ``"stale": True``.
+
+With a StationIndex attached, every upstream answer is also recorded there,
+and a lookup in a tile that is not cached is answered at once from the
+stations already known around the point (marked ``"indexed": True``) while
+the tile is fetched in the background.
+
+Tiles that expired less than ``revalidate_ttl`` seconds ago are likewise
+served at once and refreshed behind the request (stale-while-revalidate),
+and a HotTileRefresher re-fetches the most requested tiles shortly before
+they expire, so busy areas do not go cold all at once.
+"""
+
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from collections import OrderedDict
+
+import aiohttp
+
+from geo import geohash_center, geohash_encode, haversine_many
+from gasbuddy_local import gasbuddy
+from gasbuddy_local.gasbuddy.exceptions import CircuitOpenError, GasBuddyError, OverloadedError
+from station_index import StationIndex
+
+# Request counts per tile halve every this many seconds
+DEMAND_HALF_LIFE = 900
+# Tiles whose decayed request count drops below this are no longer tracked
+MIN_DEMAND = 0.1
+
+
+class TilePriceCache:
+    """Per-process cache of station results keyed by geohash tile."""
+
+    def __init__(self, precision: int = 6, ttl: float = 300, max_tiles: int = 5000,
+                 fetch_limit: int = 50, stale_ttl: float = 3600, revalidate_ttl: float = 0,
+                 index: StationIndex = None, index_radius_km: float = 3,
+                 index_min_stations: int = 5, index_max_age: float = 3600):
+        """
+        Create a cache.
+
+        Args:
+            precision: Geohash length of a tile (6 is roughly 1.2 km x 0.6 km)
+            ttl: Seconds a tile's prices are reused
+            max_tiles: Number of tiles kept before the least recent is evicted
+            fetch_limit: Stations requested from upstream per tile
+            stale_ttl: Seconds past ``ttl`` a tile is kept for upstream outages
+            revalidate_ttl: Seconds past ``ttl`` a tile is still served while it
+                is refreshed in the background (at most ``stale_ttl``)
+            index: Station index to record answers in and answer misses from
+            index_radius_km: Radius of an index answer
+            index_min_stations: Fewest stations for the index to answer a miss
+            index_max_age: Seconds a station's indexed prices may be used
+        """
+        self.precision = precision
+        self.ttl = ttl
+        self.max_tiles = max_tiles
+        self.fetch_limit = fetch_limit
+        self.stale_ttl = stale_ttl
+        self.revalidate_ttl = min(revalidate_ttl, stale_ttl)
+        self.index = index
+        self.index_radius_km = index_radius_km
+        self.index_min_stations = index_min_stations
+        self.index_max_age = index_max_age
+        self._refreshing = {}
+        # tile -> (requests, decayed by DEMAND_HALF_LIFE; time of the last one)
+        self._demand = {}
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.index_hits = 0
+        self.revalidations = 0
+
+    def tile_for(self, lat: float, lon: float) -> str:
+        """Return the tile a point falls in."""
+        return geohash_encode(lat, lon, self.precision)
+
+    def get(self, tile: str, max_stale: float = 0) -> dict | None:
+        """Return a tile's cached upstream answer if it expired less than ``max_stale`` ago."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._tiles.get(tile)
+            if entry is None:
+                return None
+            if entry[0] + self.stale_ttl <= now:
+                del self._tiles[tile]
+                return None
+            if entry[0] + max_stale <= now:
+                return None
+            self._tiles.move_to_end(tile)
+            return entry[1]
+
+    def expires_in(self, tile: str) -> float | None:
+        """Seconds until a cached tile expires (negative once expired), None if not cached."""
+        with self._lock:
+            entry = self._tiles.get(tile)
+        return None if entry is None else entry[0] - time.monotonic()
+
+    def record_demand(self, tile: str) -> None:
+        """Count a request for ``tile`` towards its hotness."""
+        now = time.monotonic()
+        with self._lock:
+            score, updated = self._demand.get(tile, (0.0, now))
+            self._demand[tile] = (_decay(score, now - updated) + 1, now)
+            if len(self._demand) > self.max_tiles:
+                self._prune_demand(now)
+
+    def _prune_demand(self, now: float) -> None:
+        """Keep the hottest half of ``max_tiles`` tracked tiles (caller holds the lock)."""
+        scores = {tile: _decay(score, now - updated)
+                  for tile, (score, updated) in self._demand.items()}
+        for tile in sorted(scores, key=scores.__getitem__)[:len(scores) - self.max_tiles // 2]:
+            del self._demand[tile]
+
+    def hot_tiles(self, count: int, min_score: float) -> list[str]:
+        """Return up to ``count`` tiles with the most recent requests, hottest first."""
+        now = time.monotonic()
+        with self._lock:
+            scores = {tile: _decay(score, now - updated)
+                      for tile, (score, updated) in self._demand.items()}
+            # Forget tiles that have cooled down
+            for tile, score in scores.items():
+                if score < MIN_DEMAND:
+                    del self._demand[tile]
+        hot = sorted((tile for tile, score in scores.items() if score >= min_score),
+                     key=scores.__getitem__, reverse=True)
+        return hot[:count]
+
+    def put(self, tile: str, value: dict) -> None:
+        """Store a tile's upstream answer."""
+        with self._lock:
+            self._tiles[tile] = (time.monotonic() + self.ttl, value)
+            self._tiles.move_to_end(tile)
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+
+    async def fetch_tile(self, client: gasbuddy.GasBuddy, tile: str) -> dict:
+        """Query upstream at the tile centre and cache the answer."""
+        center_lat, center_lon = geohash_center(tile)
+        value = await client.price_lookup_service(
+            lat=round(center_lat, 6), lon=round(center_lon, 6), limit=self.fetch_limit)
+        self.put(tile, value)
+        if self.index is not None:
+            await asyncio.to_thread(self.index.add, value.get("results", []))
+        return value
+
+    def refresh(self, client: gasbuddy.GasBuddy, tile: str) -> None:
+        """Fetch a tile in the background unless a refresh is already running."""
+        if tile in self._refreshing:
+            return
+        # A fresh context, so the refresh is not charged to the request that started it
+        task = asyncio.create_task(self._refresh(client, tile), context=contextvars.Context())
+        self._refreshing[tile] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(tile, None))
+
+    async def _refresh(self, client: gasbuddy.GasBuddy, tile: str) -> None:
+        try:
+            await self.fetch_tile(client, tile)
+        except (GasBuddyError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if not isinstance(e, (CircuitOpenError, OverloadedError)):
+                print(f"Background refresh of tile {tile} failed: {e!r}")
+
+    async def lookup(self, client: gasbuddy.GasBuddy, lat: float, lon: float,
+                     limit: int = 10) -> dict:
+        """
+        Return the ``limit`` stations nearest to (lat, lon).
+
+        Returns:
+            Dict shaped like ``price_lookup_service``'s result, plus
+            ``distances`` (km from the point, parallel to ``results``)
+        """
+        tile = self.tile_for(lat, lon)
+        if self.index is not None and self.get(tile, max_stale=self.revalidate_ttl) is None:
+            known = await asyncio.to_thread(self.index.nearby, lat, lon, self.index_radius_km,
+                                            self.index_max_age)
+            if len(known["results"]) >= self.index_min_stations:
+                self.record_demand(tile)
+                self.index_hits += 1
+                self.refresh(client, tile)
+                known["results"] = known["results"][:limit]
+                known["distances"] = known["distances"][:limit]
+                known["indexed"] = True
+                return known
+        value = await self.load(client, tile)
+        return rerank(value, lat, lon, limit)
+
+    async def load(self, client: gasbuddy.GasBuddy, tile: str) -> dict:
+        """Return a tile's answer from the cache, upstream, or (on failure) a stale copy."""
+        self.record_demand(tile)
+        value = self.get(tile)
+        if value is None and self.revalidate_ttl:
+            value = self.get(tile, max_stale=self.revalidate_ttl)
+            if value is not None:
+                self.revalidations += 1
+                self.refresh(client, tile)
+                return value
+        if value is None:
+            self.misses += 1
+            try:
+                value = await self.fetch_tile(client, tile)
+            except (GasBuddyError, aiohttp.ClientError, asyncio.TimeoutError):
+                stale = self.get(tile, max_stale=self.stale_ttl)
+                if stale is None:
+                    raise
+                self.stale_hits += 1
+                value = dict(stale, stale=True)
+        else:
+            self.hits += 1
+        return value
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for this process."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "index_hits": self.index_hits,
+            "revalidations": self.revalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "tiles": len(self._tiles),
+            "tracked_tiles": len(self._demand),
+        }
+
+
+class HotTileRefresher:
+    """Re-fetch the most requested tiles of a cache shortly before they expire."""
+
+    def __init__(self, cache: TilePriceCache, top_n: int = 50, interval: float = 30,
+                 lead: float = 60, min_score: float = 2):
+        """
+        Create a refresher.
+
+        Args:
+            cache: Tile cache to keep warm
+            top_n: Hottest tiles considered on each pass
+            interval: Seconds between passes
+            lead: Refresh tiles expiring within this many seconds
+            min_score: Fewest recent requests (decayed) for a tile to count as hot
+        """
+        self.cache = cache
+        self.top_n = top_n
+        self.interval = interval
+        self.lead = lead
+        self.min_score = min_score
+        self.refreshed = 0
+        self._task = None
+
+    def running(self, loop: asyncio.AbstractEventLoop = None) -> bool:
+        """Whether the refresher task is alive (on ``loop``, when given)."""
+        task = self._task
+        return task is not None and not task.done() and (loop is None or task.get_loop() is loop)
+
+    def start(self, client: gasbuddy.GasBuddy) -> None:
+        """Run the refresher on the running event loop (once per loop)."""
+        loop = asyncio.get_running_loop()
+        if self.running(loop):
+            return
+        self._task = loop.create_task(self._run(client), context=contextvars.Context())
+
+    def stop(self) -> None:
+        """Cancel the refresher task."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, client: gasbuddy.GasBuddy) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.refresh_due(client)
+            except Exception as e:
+                print(f"Hot tile refresh failed: {e!r}")
+
+    def refresh_due(self, client: gasbuddy.GasBuddy) -> int:
+        """Start background refreshes for hot tiles about to expire; return how many."""
+        due = 0
+        for tile in self.cache.hot_tiles(self.top_n, self.min_score):
+            expires_in = self.cache.expires_in(tile)
+            if expires_in is None or expires_in < self.lead:
+                self.cache.refresh(client, tile)
+                due += 1
+        self.refreshed += due
+        return due
+
+    def stats(self) -> dict:
+        """Return how many refreshes the refresher started in this process."""
+        return {"running": self.running(), "refreshed": self.refreshed}
+
+
+def _decay(score: float, elapsed: float) -> float:
+    """Decay a request count by ``elapsed`` seconds of DEMAND_HALF_LIFE."""
+    return score * math.exp2(-elapsed / DEMAND_HALF_LIFE)
+
+
+def rerank(value: dict, lat: float, lon: float, limit: int | None) -> dict:
+    """Return a copy of a tile answer with its nearest ``limit`` stations to (lat, lon)."""
+    results = value.get("results", [])
+    distances = haversine_many(lat, lon, [station["latitude"] for station in results],
+                               [station["longitude"] for station in results])
+    order = sorted(range(len(results)), key=distances.__getitem__)[:limit]
+    ranked = dict(value)
+    ranked["results"] = [results[index] for index in order]
+    ranked["distances"] = [distances[index] for index in order]
+    return ranked
@@ -0,0 +1,144 @@
+"""
+Per-Client Rate Limiting for the Gas Price API
+==============================================
+
+Token buckets keyed by client IP. Each request costs one read-modify-write of
+a single row, in a SQLite file every gunicorn worker on the node shares, so
+the limit holds no matter which worker a client lands on. Without a path the
+buckets live in process memory.
+
+Requests that fan out upstream (batches, route corridors) cost one token per
+upstream lookup. One larger than the whole bucket is let through only when
+the bucket is full and leaves it in debt, so the client's average rate still
+stays at ``rate``.
+"""
+
+import math
+import sqlite3
+import threading
+import time
+
+from shared_sqlite import SharedSQLite
+
+# Delete buckets that have been full for a while every this many requests
+PRUNE_EVERY = 1000
+
+
+class RateLimiter:
+    """Token bucket per key, refilled continuously at ``rate`` per minute."""
+
+    def __init__(self, rate: float, burst: int = None, path: str = None):
+        """
+        Create a limiter.
+
+        Args:
+            rate: Requests allowed per minute and key; 0 disables the limiter
+            burst: Bucket size (defaults to ``rate``)
+            path: SQLite file shared between workers; memory only when empty
+        """
+        self.rate = rate
+        self.capacity = burst or rate
+        self._per_second = rate / 60
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._db = SharedSQLite(path if rate else None, "Shared rate limiting", (
+            "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)",
+        ))
+        self._calls = 0
+        self.allowed = 0
+        self.limited = 0
+        self._db.connect()
+
+    def _refill(self, state, now: float) -> float:
+        """Tokens in a bucket last seen with ``state`` = (tokens, updated)."""
+        if state is None:
+            return self.capacity
+        tokens, updated = state
+        return min(self.capacity, tokens + max(0.0, now - updated) * self._per_second)
+
+    def _take(self, tokens: float, cost: float) -> tuple[float, float]:
+        """Spend ``cost`` tokens if possible; return (tokens left, seconds to wait)."""
+        needed = min(cost, self.capacity)
+        if tokens >= needed:
+            return tokens - cost, 0.0
+        return tokens, (needed - tokens) / self._per_second
+
+    def acquire(self, key: str, cost: float = 1) -> float:
+        """
+        Spend ``cost`` tokens from ``key``'s bucket.
+
+        Returns:
+            0 when the request may proceed, else seconds until it would be allowed
+        """
+        if not self.rate:
+            return 0.0
+        now = time.time()
+        conn = self._db.connect()
+        wait = None
+        if conn is not None:
+            wait = self._acquire_shared(conn, key, now, cost)
+        if wait is None:
+            with self._lock:
+                tokens, wait = self._take(self._refill(self._memory.get(key), now), cost)
+                self._memory[key] = (tokens, now)
+
+        if wait:
+            self.limited += 1
+        else:
+            self.allowed += 1
+        self._calls += 1
+        if self._calls % PRUNE_EVERY == 0:
+            self._prune(now)
+        return wait
+
+    def _acquire_shared(self, conn: sqlite3.Connection, key: str, now: float,
+                        cost: float) -> float | None:
+        """Update the bucket row atomically; None if the store is unavailable."""
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT tokens, updated FROM buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens, wait = self._take(self._refill(row, now), cost)
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                    (key, tokens, now),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            return None
+        return wait
+
+    def _prune(self, now: float) -> None:
+        """Forget buckets idle long enough to be full again (debts included)."""
+        with self._lock:
+            for key in [key for key, state in self._memory.items()
+                        if self._refill(state, now) >= self.capacity]:
+                del self._memory[key]
+        conn = self._db.connect()
+        if conn is not None:
+            try:
+                conn.execute(
+                    "DELETE FROM buckets WHERE updated + (? - tokens) / ? <= ?",
+                    (self.capacity, self._per_second, now),
+                )
+            except sqlite3.Error:
+                pass
+
+    def stats(self) -> dict:
+        """Return allowed/limited counters for this process."""
+        return {
+            "rate_per_minute": self.rate,
+            "burst": self.capacity,
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+def retry_after(wait: float) -> str:
+    """Format a wait in seconds as a ``Retry-After`` header value."""
+    return str(max(1, math.ceil(wait)))
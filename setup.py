@@ -15,6 +15,7 @@ try:
             "py-gasbuddy==0.3.8",  # Try PyPI first
             "requests==2.32.5",
             "gunicorn==23.0.0",
+            "uvicorn==0.35.0",
             "aiohttp==3.12.15",
             "backoff==2.2.1",
             "attrs==25.3.0",
@@ -34,6 +35,7 @@ except Exception:
             "Flask==3.1.2",
             "requests==2.32.5",
             "gunicorn==23.0.0",
+            "uvicorn==0.35.0",
             "aiohttp==3.12.15",
             "backoff==2.2.1",
             "attrs==25.3.0",
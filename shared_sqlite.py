@@ -0,0 +1,58 @@
+"""
+Shared SQLite Files for the Gas Price API
+=========================================
+
+The geocode cache, the rate limiter and the station index each keep their
+state in a SQLite file that every gunicorn worker on the node shares. Each
+thread gets its own connection (and a forked worker opens fresh ones rather
+than reusing its parent's), in WAL mode so readers never wait for the writer.
+The first error opening the file disables it for the process; the owner then
+falls back to process memory.
+"""
+
+import os
+import sqlite3
+import threading
+
+# Seconds a statement waits for another worker's write lock
+BUSY_TIMEOUT = 5
+
+
+class SharedSQLite:
+    """Per-thread connections to one SQLite file shared between workers."""
+
+    def __init__(self, path: str, name: str, schema: tuple[str, ...], pragmas: tuple[str, ...] = ()):
+        """
+        Describe a shared file; nothing is opened until ``connect``.
+
+        Args:
+            path: SQLite file; memory only (connect returns None) when empty
+            name: What the file holds, for the message printed when it fails
+            schema: Statements creating the tables and indexes (IF NOT EXISTS)
+            pragmas: Extra pragmas (``"name=value"``) for every connection
+        """
+        self.path = path
+        self.name = name
+        self.schema = schema
+        self.pragmas = ("journal_mode=WAL", "synchronous=NORMAL", *pragmas)
+        self._local = threading.local()
+
+    def connect(self) -> sqlite3.Connection | None:
+        """Return this thread's SQLite connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        if not self.path:
+            return None
+        try:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+            for pragma in self.pragmas:
+                conn.execute(f"PRAGMA {pragma}")
+            for statement in self.schema:
+                conn.execute(statement)
+        except sqlite3.Error as e:
+            print(f"{self.name} disabled: {e}")
+            self.path = None
+            return None
+        self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
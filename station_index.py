@@ -0,0 +1,184 @@
+"""
+Local Station Index for the Gas Price API
+=========================================
+
+Every station GasBuddy returns is remembered with its position and last
+known prices, bucketed on a fixed lat/lon grid in a SQLite file that every
+gunicorn worker on the node shares (memory-mapped, so reads come straight
+from the page cache). "Stations within R km of a point" is then answered
+locally, by reading the grid cells around the point and keeping the ones
+inside the radius. Without a path the index lives in process memory.
+
+The calls here block on SQLite; async callers run them with
+``asyncio.to_thread`` so the event loop keeps serving other requests.
+"""
+
+import math
+import sqlite3
+import threading
+import time
+
+from geo import EARTH_RADIUS_KM, haversine_many
+from shared_sqlite import SharedSQLite
+from gasbuddy_local.gasbuddy import codec
+from gasbuddy_local.gasbuddy.models import Station
+
+# Grid cell size in degrees (0.05 is about 5.5 km north-south)
+CELL_DEGREES = 0.05
+# Bytes of the index file SQLite maps into memory
+MMAP_SIZE = 256 * 1024 * 1024
+
+_KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def _cell(degrees: float) -> int:
+    return math.floor(degrees / CELL_DEGREES)
+
+
+class StationIndex:
+    """Last known stations, queryable by distance from a point."""
+
+    def __init__(self, path: str = None):
+        """
+        Create an index.
+
+        Args:
+            path: SQLite file shared between workers; memory only when empty
+        """
+        self._cells = {}
+        self._station_cells = {}
+        self._lock = threading.Lock()
+        self._db = SharedSQLite(path, "Station index", (
+            "CREATE TABLE IF NOT EXISTS stations (station_id TEXT PRIMARY KEY, row INTEGER, "
+            "col INTEGER, lat REAL, lon REAL, updated REAL, data BLOB)",
+            "CREATE INDEX IF NOT EXISTS stations_cell ON stations (row, col)",
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)",
+        ), pragmas=(f"mmap_size={MMAP_SIZE}",))
+        self.queries = 0
+        self.stored = 0
+        # Stations in the index as of this process's last write (no COUNT(*) per scrape)
+        self.stations = 0
+        self._count_stations()
+
+    def _count_stations(self) -> None:
+        """Read the station counter, seeding it from the table the first time a file is opened."""
+        conn = self._db.connect()
+        if conn is None:
+            return
+        try:
+            # A no-op once the counter exists; add() keeps it current from then on
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) "
+                         "SELECT 'stations', COUNT(*) FROM stations "
+                         "WHERE NOT EXISTS (SELECT 1 FROM meta WHERE key = 'stations')")
+            self.stations = conn.execute(
+                "SELECT value FROM meta WHERE key = 'stations'").fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Station index counter unavailable: {e}")
+
+    def add(self, stations) -> None:
+        """Remember (or refresh) stations from an upstream answer."""
+        now = time.time()
+        rows = []
+        for station in stations:
+            station_id, lat, lon = (station.get("station_id"), station.get("latitude"),
+                                    station.get("longitude"))
+            if station_id is None or lat is None or lon is None:
+                continue
+            rows.append((str(station_id), _cell(lat), _cell(lon), lat, lon, now,
+                         codec.dumps(station)))
+        if not rows:
+            return
+        self.stored += len(rows)
+
+        conn = self._db.connect()
+        if conn is not None:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    ids = list({row[0] for row in rows})
+                    known = conn.execute(
+                        "SELECT COUNT(*) FROM stations WHERE station_id IN "
+                        f"({', '.join('?' * len(ids))})", ids,
+                    ).fetchone()[0]
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO stations "
+                        "(station_id, row, col, lat, lon, updated, data) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        rows,
+                    )
+                    conn.execute("UPDATE meta SET value = value + ? WHERE key = 'stations'",
+                                 (len(ids) - known,))
+                    total = conn.execute(
+                        "SELECT value FROM meta WHERE key = 'stations'").fetchone()[0]
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                self.stations = total
+                return
+            except sqlite3.Error:
+                pass
+
+        with self._lock:
+            for station_id, row, col, lat, lon, updated, data in rows:
+                previous = self._station_cells.get(station_id)
+                if previous is not None and previous != (row, col):
+                    self._cells[previous].pop(station_id, None)
+                self._station_cells[station_id] = (row, col)
+                self._cells.setdefault((row, col), {})[station_id] = (lat, lon, updated, data)
+            self.stations = len(self._station_cells)
+
+    def _candidates(self, rows: tuple[int, int], cols: tuple[int, int], since: float) -> list:
+        """Return (lat, lon, data) of stations seen after ``since`` in a block of cells."""
+        conn = self._db.connect()
+        if conn is not None:
+            try:
+                return conn.execute(
+                    "SELECT lat, lon, data FROM stations "
+                    "WHERE row BETWEEN ? AND ? AND col BETWEEN ? AND ? AND updated >= ?",
+                    (*rows, *cols, since),
+                ).fetchall()
+            except sqlite3.Error:
+                pass
+        with self._lock:
+            return [
+                (lat, lon, data)
+                for row in range(rows[0], rows[1] + 1)
+                for col in range(cols[0], cols[1] + 1)
+                for lat, lon, updated, data in self._cells.get((row, col), {}).values()
+                if updated >= since
+            ]
+
+    def nearby(self, lat: float, lon: float, radius_km: float, max_age: float) -> dict:
+        """
+        Return the stations within ``radius_km`` of (lat, lon), nearest first.
+
+        Args:
+            lat: Latitude of the point
+            lon: Longitude of the point
+            radius_km: Search radius
+            max_age: Ignore stations last seen more than this many seconds ago
+
+        Returns:
+            Dict shaped like ``price_lookup_service``'s result (Station records), plus
+            ``distances`` (km from the point, parallel to ``results``)
+        """
+        self.queries += 1
+        pad_lat = radius_km / _KM_PER_DEGREE
+        pad_lon = pad_lat / max(0.01, math.cos(math.radians(min(89.0, abs(lat) + pad_lat))))
+        candidates = self._candidates((_cell(lat - pad_lat), _cell(lat + pad_lat)),
+                                      (_cell(lon - pad_lon), _cell(lon + pad_lon)),
+                                      time.time() - max_age)
+
+        distances = haversine_many(lat, lon, [row[0] for row in candidates],
+                                   [row[1] for row in candidates])
+        order = sorted((index for index, distance in enumerate(distances)
+                        if distance <= radius_km), key=distances.__getitem__)
+        return {
+            "results": [Station.from_dict(codec.loads(candidates[index][2])) for index in order],
+            "distances": [distances[index] for index in order],
+        }
+
+    def stats(self) -> dict:
+        """Return the index size and counters for this process (without touching SQLite)."""
+        return {"stations": self.stations, "stored": self.stored, "queries": self.queries}
@@ -0,0 +1,76 @@
+"""Tests for choosing and filtering the tiles of a route corridor search."""
+
+import math
+import random
+
+import pytest
+
+from corridor import RouteIndex, corridor_tiles, densify, plan_corridor
+from geo import geohash_center, haversine_km
+
+REACH_KM = 15
+PRECISION = 5
+
+ROUTES = {
+    "east_west": [(40.0, -100.0), (40.0, -94.13)],
+    "north_south": [(35.0, -100.0), (39.5, -100.0)],
+    "diagonal": [(35.0, -100.0), (38.2, -96.1)],
+    "zigzag": [(40.0, -100.0), (40.3, -99.5), (40.0, -99.0), (40.4, -98.6), (40.0, -98.65),
+               (40.2, -98.0)],
+    "hairpin": [(40.0, -100.0), (40.0, -99.0), (40.03, -99.0), (40.03, -100.0)],
+}
+
+
+def corridor_points(points, width_km, count=2000):
+    """Random points within ``width_km`` of the route."""
+    rng = random.Random(7)
+    dense = densify(points, 0.2)
+    for _ in range(count):
+        lat, lon = rng.choice(dense)
+        distance, angle = width_km * math.sqrt(rng.random()), rng.uniform(0, 2 * math.pi)
+        yield (lat + distance * math.sin(angle) / 111.19,
+               lon + distance * math.cos(angle) / (111.19 * math.cos(math.radians(lat))))
+
+
+@pytest.mark.parametrize("name", ROUTES)
+@pytest.mark.parametrize("width_km", [0.5, 2, 10, 25])
+def test_tiles_cover_the_whole_corridor(name, width_km):
+    points = ROUTES[name]
+    centers = [geohash_center(tile)
+               for tile in corridor_tiles(points, width_km, PRECISION, REACH_KM, 1000)]
+    for lat, lon in corridor_points(points, width_km):
+        assert min(haversine_km(lat, lon, *center) for center in centers) <= REACH_KM
+
+
+@pytest.mark.parametrize("name", ["east_west", "north_south", "diagonal"])
+def test_long_route_costs_tens_of_tiles(name):
+    assert len(corridor_tiles(ROUTES[name], 2, PRECISION, REACH_KM, 1000)) < 40
+
+
+def test_tiles_are_distinct_and_in_route_order():
+    there = [(40.0, -100.0), (40.0, -97.0)]
+    tiles = corridor_tiles(there + there[::-1], 2, PRECISION, REACH_KM, 1000)
+    assert len(tiles) == len(set(tiles))
+    longitudes = [geohash_center(tile)[1] for tile in tiles]
+    assert longitudes == sorted(longitudes)
+
+
+def test_too_long_route_is_rejected():
+    with pytest.raises(ValueError, match="Route too long"):
+        plan_corridor([[40.0, -100.0], [40.0, -80.0]], 2, PRECISION, REACH_KM, max_tiles=20)
+
+
+def test_too_wide_for_the_reach_is_rejected():
+    with pytest.raises(ValueError, match="too wide"):
+        corridor_tiles(ROUTES["east_west"], 25, 3, REACH_KM, 1000)
+
+
+def test_locate_measures_off_and_along_the_route():
+    index = RouteIndex(densify([(40.0, -100.0), (40.0, -99.0)]), width_km=2)
+    off, along = index.locate(40.01, -99.5)
+    assert off == pytest.approx(1.11, abs=0.01)
+    assert along == pytest.approx(index.length_km / 2, abs=0.1)
+    assert index.locate(40.03, -99.5) is None
+    # The corridor ends are round
+    assert index.locate(40.0, -100.02) is not None
+    assert index.locate(40.0, -100.03) is None
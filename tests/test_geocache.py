@@ -0,0 +1,54 @@
+"""Tests for the two-tier geocode cache and the geocoder's use of it."""
+
+import asyncio
+import threading
+
+from geocache import MISSING, GeocodeCache
+from geocoding import Geocoder
+
+
+def test_disk_tier_is_shared_and_refills_memory(tmp_path):
+    path = str(tmp_path / "geocode.sqlite3")
+    GeocodeCache(path).set("US|90210", (34.1, -118.4))
+    cache = GeocodeCache(path)
+    assert cache.get_memory("US|90210") is MISSING
+    assert cache.get("US|90210") == (34.1, -118.4)
+    assert cache.get_memory("US|90210") == (34.1, -118.4)
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 0)
+
+
+def test_not_found_is_cached_and_missing_is_counted(tmp_path):
+    cache = GeocodeCache(str(tmp_path / "geocode.sqlite3"))
+    cache.set("GB|nowhere", None)
+    assert cache.get("GB|nowhere") is None
+    assert cache.get("GB|elsewhere") is MISSING
+    assert cache.stats()["misses"] == 1
+
+
+def test_geocoder_reads_and_writes_the_disk_in_a_thread(tmp_path):
+    cache = GeocodeCache(str(tmp_path / "geocode.sqlite3"))
+    threads = []
+    for name in ("get_disk", "set_disk"):
+        method = getattr(cache, name)
+        setattr(cache, name, lambda *args, method=method: (
+            threads.append(threading.current_thread() is threading.main_thread()),
+            method(*args))[1])
+    geocoder = Geocoder(cache=cache)
+    searches = []
+
+    async def search(location, country_code=None):
+        searches.append(location)
+        return (51.5, -0.13), True
+
+    geocoder._search = search
+
+    async def main():
+        first = await geocoder.geocode("London", "GB")
+        second = await geocoder.geocode("london", "gb")
+        return first, second
+
+    assert asyncio.run(main()) == ((51.5, -0.13), (51.5, -0.13))
+    assert searches == ["London"]
+    # One disk read on the first miss, one disk write; the second call hit memory
+    assert threads == [False, False]
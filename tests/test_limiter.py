@@ -0,0 +1,197 @@
+"""Tests for the adaptive concurrency limit and the circuit breaker."""
+
+import asyncio
+import time
+
+import pytest
+
+from gasbuddy_local.gasbuddy.exceptions import CircuitOpenError, OverloadedError
+from gasbuddy_local.gasbuddy.limiter import AdaptiveLimiter, CircuitBreaker, is_overload
+
+
+def make_limiter(initial=4, **kwargs):
+    return AdaptiveLimiter(initial, minimum=1, maximum=10, latency_target=5.0, **kwargs)
+
+
+def test_is_overload():
+    assert is_overload(None)
+    assert is_overload(429)
+    assert is_overload(503)
+    assert not is_overload(200)
+    assert not is_overload(404)
+
+
+def test_limit_grows_additively_on_fast_success():
+    async def run():
+        limiter = make_limiter(4)
+        for _ in range(4):
+            limiter.release(await limiter.acquire(), overloaded=False)
+        return limiter
+
+    limiter = asyncio.run(run())
+    # +1/limit per round trip: four successes at a limit of ~4 add about one slot
+    assert 4.9 < limiter.limit < 5.0
+    assert limiter.in_flight == 0
+
+
+def test_limit_halves_once_per_round_trip():
+    async def run():
+        limiter = make_limiter(8)
+        started = [await limiter.acquire() for _ in range(3)]
+        for granted in started:
+            limiter.release(granted, overloaded=True)
+        return limiter
+
+    limiter = asyncio.run(run())
+    # The three requests were all in flight before the cut, so only one counts
+    assert limiter.limit == 4
+    assert limiter.decreases == 1
+
+
+def test_slow_answer_halves_and_limit_stays_above_minimum():
+    async def run():
+        limiter = make_limiter(2)
+        limiter.release(time.monotonic() - 10, overloaded=False)
+        limiter.in_flight += 1  # the release above had no matching acquire
+        limiter.release(await limiter.acquire(), overloaded=True)
+        return limiter
+
+    limiter = asyncio.run(run())
+    assert limiter.limit == 1
+
+
+def test_abandoned_request_keeps_limit():
+    async def run():
+        limiter = make_limiter(4)
+        limiter.release(await limiter.acquire(), overloaded=None)
+        return limiter
+
+    limiter = asyncio.run(run())
+    assert limiter.limit == 4
+    assert limiter.in_flight == 0
+
+
+def test_cancelled_waiter_hands_its_slot_on():
+    async def run():
+        limiter = make_limiter(1)
+        first = await limiter.acquire()
+        second = asyncio.create_task(limiter.acquire())
+        third = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.stats()["waiting"] == 2
+
+        # The slot is handed to ``second``, which is cancelled before it runs
+        limiter.release(first, overloaded=None)
+        second.cancel()
+        granted = await asyncio.wait_for(third, 1)
+        assert second.cancelled()
+        assert limiter.in_flight == 1
+        limiter.release(granted, overloaded=None)
+        return limiter
+
+    limiter = asyncio.run(run())
+    assert limiter.in_flight == 0
+    assert limiter.stats()["waiting"] == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def run():
+        limiter = make_limiter(1)
+        granted = await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert limiter.stats()["waiting"] == 0
+        limiter.release(granted, overloaded=None)
+        return limiter
+
+    assert asyncio.run(run()).in_flight == 0
+
+
+def test_full_queue_fails_fast():
+    async def run():
+        limiter = make_limiter(1, max_waiting=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(OverloadedError):
+            await limiter.acquire()
+        waiter.cancel()
+        return limiter
+
+    assert asyncio.run(run()).shed == 1
+
+
+def test_wait_deadline_fails_fast():
+    async def run():
+        limiter = make_limiter(1, max_wait=0.01)
+        await limiter.acquire()
+        with pytest.raises(OverloadedError):
+            await limiter.acquire()
+        return limiter
+
+    limiter = asyncio.run(run())
+    assert limiter.shed == 1
+    assert limiter.stats()["waiting"] == 0
+    assert limiter.in_flight == 1
+
+
+def make_breaker(reset_timeout=0.05):
+    return CircuitBreaker(window=4, min_calls=4, failure_ratio=0.5, reset_timeout=reset_timeout)
+
+
+def test_breaker_trips_then_probes_then_closes():
+    breaker = make_breaker()
+    for failed in (True, False, True, False):
+        breaker.check()
+        breaker.record(failed)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    time.sleep(0.06)
+    breaker.check()  # the probe
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()  # only one probe at a time
+
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.check()
+    assert breaker.stats() == {"state": "closed", "opened": 1, "rejected": 2}
+
+
+def test_breaker_stays_closed_below_min_calls_and_ratio():
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker = make_breaker()
+    for failed in (True, False, False, False):
+        breaker.record(failed)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_probe_reopens():
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record(True)
+    time.sleep(0.06)
+    breaker.check()
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.opened == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def test_lost_probe_is_replaced():
+    breaker = make_breaker(reset_timeout=0.02)
+    for _ in range(4):
+        breaker.record(True)
+    time.sleep(0.03)
+    breaker.check()  # probe that never reports back
+    time.sleep(0.03)
+    breaker.check()  # replaced after reset_timeout
+    assert breaker.state == CircuitBreaker.HALF_OPEN
@@ -0,0 +1,132 @@
+"""Tests for the tile cache's expiry windows and the hot tile refresher."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import price_cache
+from gasbuddy_local.gasbuddy.exceptions import GasBuddyError
+from price_cache import DEMAND_HALF_LIFE, HotTileRefresher, TilePriceCache
+
+TILE = "dr5reg"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    # Only the cache's clock: asyncio keeps using the real time.monotonic
+    monkeypatch.setattr(price_cache, "time", SimpleNamespace(monotonic=lambda: now[0],
+                                                             time=time.time))
+    return now
+
+
+class FakeClient:
+    """Answers price lookups with one station, counting the calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    async def price_lookup_service(self, lat, lon, limit):
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.fail:
+            raise GasBuddyError("upstream down")
+        return {"results": [{"station_id": self.calls, "latitude": lat, "longitude": lon}]}
+
+
+def make_cache(**kwargs):
+    return TilePriceCache(**{"ttl": 300, "stale_ttl": 3600, "revalidate_ttl": 60, **kwargs})
+
+
+def test_revalidation_window_serves_cached_and_refreshes_once(clock):
+    cache, client = make_cache(), FakeClient()
+
+    async def main():
+        first = await cache.load(client, TILE)
+        clock[0] += 330  # expired 30 s ago, inside the 60 s revalidation window
+        served = [await cache.load(client, TILE) for _ in range(3)]
+        await asyncio.gather(*cache._refreshing.values())
+        return first, served
+
+    first, served = asyncio.run(main())
+    assert all(value is first for value in served)
+    assert client.calls == 2  # the first miss, then exactly one background refresh
+    assert cache.revalidations == 3
+    assert cache.expires_in(TILE) == pytest.approx(300)
+
+
+def test_past_revalidation_window_waits_for_upstream(clock):
+    cache, client = make_cache(), FakeClient()
+
+    async def main():
+        await cache.load(client, TILE)
+        clock[0] += 300 + 61
+        return await cache.load(client, TILE)
+
+    assert asyncio.run(main())["results"][0]["station_id"] == 2
+    assert (cache.misses, cache.revalidations) == (2, 0)
+
+
+def test_stale_copy_only_until_stale_ttl(clock):
+    cache, client = make_cache(revalidate_ttl=0), FakeClient()
+
+    async def main():
+        await cache.load(client, TILE)
+        client.fail = True
+        clock[0] += 300 + 1800
+        stale = await cache.load(client, TILE)
+        clock[0] += 1800
+        with pytest.raises(GasBuddyError):
+            await cache.load(client, TILE)
+        return stale
+
+    assert asyncio.run(main())["stale"] is True
+    assert cache.get(TILE, max_stale=10 ** 6) is None
+    assert cache.stale_hits == 1
+
+
+def test_revalidate_ttl_is_clamped_to_stale_ttl():
+    assert TilePriceCache(stale_ttl=600, revalidate_ttl=3600).revalidate_ttl == 600
+
+
+def test_demand_decays_and_cold_tiles_are_forgotten(clock):
+    cache = make_cache()
+    for _ in range(4):
+        cache.record_demand(TILE)
+    clock[0] += DEMAND_HALF_LIFE
+    assert cache.hot_tiles(10, min_score=2) == [TILE]
+    clock[0] += DEMAND_HALF_LIFE
+    assert cache.hot_tiles(10, min_score=2) == []
+    clock[0] += 4 * DEMAND_HALF_LIFE
+    cache.hot_tiles(10, min_score=2)
+    assert cache.stats()["tracked_tiles"] == 0
+
+
+def test_demand_pruning_keeps_the_hottest_half(clock):
+    cache = make_cache(max_tiles=4)
+    for count, tile in enumerate(["t1", "t2", "t3", "t4"], start=1):
+        for _ in range(count * 2):
+            cache.record_demand(tile)
+    cache.record_demand("t5")
+    assert sorted(cache.hot_tiles(10, min_score=0)) == ["t3", "t4"]
+
+
+def test_only_hot_tiles_close_to_expiry_are_refreshed(clock):
+    cache = make_cache()
+    refresher = HotTileRefresher(cache, top_n=10, lead=60, min_score=2)
+    for tile in ("expiring", "fresh", "uncached", "cold"):
+        for _ in range(1 if tile == "cold" else 3):
+            cache.record_demand(tile)
+    cache.put("expiring", {"results": []})
+    cache.put("cold", {"results": []})
+    clock[0] += 250  # expiring and cold now expire in 50 s
+    cache.put("fresh", {"results": []})
+    refreshed = []
+    cache.refresh = lambda client, tile: refreshed.append(tile)
+
+    assert refresher.refresh_due(client=None) == 2
+    assert sorted(refreshed) == ["expiring", "uncached"]
+    assert refresher.stats()["refreshed"] == 2
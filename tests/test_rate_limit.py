@@ -0,0 +1,92 @@
+"""Tests for the per-client token bucket rate limiter."""
+
+import pytest
+
+import rate_limit
+from rate_limit import RateLimiter, retry_after
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_limiter(request, tmp_path):
+    def make(rate, burst=None):
+        path = str(tmp_path / "buckets.sqlite3") if request.param == "sqlite" else None
+        return RateLimiter(rate, burst, path)
+    return make
+
+
+def test_burst_then_limited(clock, make_limiter):
+    limiter = make_limiter(60, burst=3)
+    assert [limiter.acquire("1.2.3.4") for _ in range(3)] == [0, 0, 0]
+    # One token per second at 60 per minute
+    assert limiter.acquire("1.2.3.4") == pytest.approx(1.0)
+    assert limiter.acquire("5.6.7.8") == 0
+    assert limiter.stats()["limited"] == 1
+
+
+def test_bucket_refills_over_time(clock, make_limiter):
+    limiter = make_limiter(60, burst=1)
+    assert limiter.acquire("ip") == 0
+    assert limiter.acquire("ip") > 0
+    clock[0] += 1.0
+    assert limiter.acquire("ip") == 0
+
+
+def test_zero_rate_disables(make_limiter):
+    limiter = make_limiter(0)
+    assert all(limiter.acquire("ip") == 0 for _ in range(100))
+
+
+def test_workers_share_the_sqlite_bucket(clock, tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    first, second = RateLimiter(60, 2, path), RateLimiter(60, 2, path)
+    assert first.acquire("ip") == 0
+    assert second.acquire("ip") == 0
+    assert first.acquire("ip") > 0
+
+
+def test_prune_forgets_full_buckets(clock, make_limiter):
+    limiter = make_limiter(60, burst=2)
+    limiter.acquire("ip")
+    clock[0] += 10
+    limiter._prune(clock[0])
+    assert limiter._memory == {}
+    assert limiter.acquire("ip") == 0
+
+
+def test_cost_spends_several_tokens(clock, make_limiter):
+    limiter = make_limiter(60, burst=5)
+    assert limiter.acquire("ip", 3) == 0
+    # Two tokens left, four needed: two seconds at one token per second
+    assert limiter.acquire("ip", 4) == pytest.approx(2.0)
+    assert limiter.acquire("ip", 2) == 0
+
+
+def test_cost_above_burst_leaves_a_debt(clock, make_limiter):
+    limiter = make_limiter(60, burst=5)
+    # Allowed from a full bucket, then paid back before the next request
+    assert limiter.acquire("ip", 12) == 0
+    assert limiter.acquire("ip") == pytest.approx(8.0)
+    clock[0] += 7
+    assert limiter.acquire("ip", 12) == pytest.approx(5.0)
+    clock[0] += 8
+    assert limiter.acquire("ip") == 0
+
+
+def test_prune_keeps_buckets_in_debt(clock, make_limiter):
+    limiter = make_limiter(60, burst=2)
+    limiter.acquire("ip", 10)
+    clock[0] += 5
+    limiter._prune(clock[0])
+    assert limiter.acquire("ip") > 0
+
+
+def test_retry_after_rounds_up():
+    assert retry_after(0.2) == "1"
+    assert retry_after(1.5) == "2"
@@ -0,0 +1,35 @@
+"""Tests for the per-thread SQLite connections shared by the caches."""
+
+import threading
+
+import shared_sqlite
+from shared_sqlite import SharedSQLite
+
+SCHEMA = ("CREATE TABLE IF NOT EXISTS items (key TEXT PRIMARY KEY)",)
+
+
+def test_one_connection_per_thread(tmp_path):
+    db = SharedSQLite(str(tmp_path / "items.sqlite3"), "Items", SCHEMA)
+    conn = db.connect()
+    assert db.connect() is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    other = []
+    thread = threading.Thread(target=lambda: other.append(db.connect()))
+    thread.start()
+    thread.join()
+    assert other[0] is not None and other[0] is not conn
+
+
+def test_forked_process_opens_its_own_connection(tmp_path, monkeypatch):
+    db = SharedSQLite(str(tmp_path / "items.sqlite3"), "Items", SCHEMA)
+    parent = db.connect()
+    monkeypatch.setattr(shared_sqlite.os, "getpid", lambda: -1)
+    assert db.connect() is not parent
+
+
+def test_unusable_file_falls_back_to_memory(tmp_path, capsys):
+    db = SharedSQLite(str(tmp_path / "missing" / "items.sqlite3"), "Items", SCHEMA)
+    assert db.connect() is None
+    assert db.path is None
+    assert "Items disabled" in capsys.readouterr().out
+    assert SharedSQLite(None, "Items", SCHEMA).connect() is None
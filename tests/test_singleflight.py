@@ -0,0 +1,68 @@
+"""Tests for single-flight request coalescing."""
+
+import asyncio
+
+import pytest
+
+from gasbuddy_local.gasbuddy.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    calls = []
+
+    async def fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key.upper()
+
+    async def run():
+        flight = SingleFlight()
+        results = await asyncio.gather(
+            *(flight.do(key, lambda key=key: fetch(key)) for key in ("a", "a", "a", "b"))
+        )
+        return flight, results
+
+    flight, results = asyncio.run(run())
+    assert results == ["A", "A", "A", "B"]
+    assert calls == ["a", "b"]
+    assert flight.stats() == {"calls": 2, "coalesced": 2, "in_flight": 0}
+
+
+def test_finished_call_is_not_reused():
+    async def run():
+        flight = SingleFlight()
+        first = await flight.do("key", lambda: asyncio.sleep(0, "first"))
+        second = await flight.do("key", lambda: asyncio.sleep(0, "second"))
+        return flight, first, second
+
+    flight, first, second = asyncio.run(run())
+    assert (first, second) == ("first", "second")
+    assert flight.calls == 2
+
+
+def test_error_reaches_every_caller():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream")
+
+    async def run():
+        flight = SingleFlight()
+        return await asyncio.gather(flight.do("key", fail), flight.do("key", fail),
+                                    return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert [type(result) for result in results] == [ValueError, ValueError]
+
+
+def test_cancelled_caller_does_not_cancel_the_call():
+    async def run():
+        flight = SingleFlight()
+        first = asyncio.create_task(flight.do("key", lambda: asyncio.sleep(0.01, "done")))
+        second = asyncio.create_task(flight.do("key", lambda: asyncio.sleep(0.01, "other")))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "done"
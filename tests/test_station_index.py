@@ -0,0 +1,45 @@
+"""Tests for the local station index."""
+
+import pytest
+
+from station_index import StationIndex
+
+
+def station(station_id, lat, lon):
+    return {"station_id": station_id, "unit_of_measure": "us_gallons", "currency": "USD",
+            "latitude": lat, "longitude": lon}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def index(request, tmp_path):
+    return StationIndex(str(tmp_path / "stations.sqlite3") if request.param == "sqlite" else None)
+
+
+def test_counter_counts_distinct_stations(index):
+    index.add([station(1, 40.0, -74.0), station(2, 40.01, -74.0)])
+    index.add([station(2, 40.01, -74.0), station(3, 40.02, -74.0), station(3, 40.02, -74.0)])
+    assert index.stats()["stations"] == 3
+
+
+def test_counter_survives_reopening_and_is_shared(tmp_path):
+    path = str(tmp_path / "stations.sqlite3")
+    first = StationIndex(path)
+    first.add([station(1, 40.0, -74.0), station(2, 40.01, -74.0)])
+    second = StationIndex(path)
+    assert second.stats()["stations"] == 2
+    second.add([station(2, 40.01, -74.0), station(3, 40.02, -74.0)])
+    assert second.stats()["stations"] == 3
+
+
+def test_counter_is_seeded_from_an_existing_file(tmp_path):
+    path = str(tmp_path / "stations.sqlite3")
+    StationIndex(path).add([station(1, 40.0, -74.0)])
+    StationIndex(path)._db.connect().execute("DROP TABLE meta")
+    assert StationIndex(path).stats()["stations"] == 1
+
+
+def test_nearby_orders_by_distance(index):
+    index.add([station(1, 40.02, -74.0), station(2, 40.0, -74.0), station(3, 41.0, -74.0)])
+    found = index.nearby(40.0, -74.0, radius_km=5, max_age=60)
+    assert [result.station_id for result in found["results"]] == [2, 1]
+    assert found["distances"] == sorted(found["distances"])
@@ -0,0 +1,77 @@
+"""
+Per-Request Timing Breakdown
+============================
+
+Splits a request's latency into geocode, CSRF, upstream GraphQL, parse and
+serialize phases and renders them as a ``Server-Timing`` header.
+
+The GasBuddy clients are shared by every request in a worker, so the client
+hooks find the request they are working for through a context variable. It
+is set inside the request's coroutine and inherited by the tasks it starts.
+"""
+
+import time
+from contextvars import ContextVar
+
+PHASES = ("geocode", "csrf", "graphql", "parse", "serialize")
+
+_current: ContextVar["RequestTimings | None"] = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """Accumulated seconds per phase for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Add ``seconds`` to ``phase``."""
+        self.phases[phase] += seconds
+
+    async def measure(self, phase: str, awaitable):
+        """Await ``awaitable`` and charge its duration to ``phase``."""
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.add(phase, time.perf_counter() - started)
+
+    def total(self) -> float:
+        """Seconds since the request started."""
+        return time.perf_counter() - self.started
+
+    def to_dict(self) -> dict:
+        """Phase durations in milliseconds, for the debug ``timing`` block."""
+        timing = {phase: round(seconds * 1000, 3)
+                  for phase, seconds in self.phases.items() if seconds}
+        timing["total"] = round(self.total() * 1000, 3)
+        return timing
+
+    def header(self) -> str:
+        """Render the ``Server-Timing`` header value."""
+        parts = [f"{phase};dur={seconds * 1000:.3f}"
+                 for phase, seconds in self.phases.items() if seconds]
+        parts.append(f"total;dur={self.total() * 1000:.3f}")
+        return ", ".join(parts)
+
+
+def activate(timings: RequestTimings | None) -> None:
+    """Attribute upstream work done by the current coroutine to ``timings``."""
+    _current.set(timings)
+
+
+async def _on_response(operation, elapsed, **details):
+    timings = _current.get()
+    if timings is not None:
+        timings.add("csrf" if operation == "csrf" else "graphql", elapsed)
+
+
+async def _on_parse_done(elapsed, **details):
+    timings = _current.get()
+    if timings is not None:
+        timings.add("parse", elapsed)
+
+
+# Keyword arguments for the shared GasBuddy clients
+CLIENT_HOOKS = {"on_response": _on_response, "on_parse_done": _on_parse_done}